@@ -0,0 +1,31 @@
+"""
+自定义路由类
+"""
+
+from typing import Any, Callable
+
+import orjson
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+
+class ORJSONRequest(Request):
+    """使用orjson解析请求体的Request"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, '_json'):
+            # orjson.JSONDecodeError继承自json.JSONDecodeError，FastAPI仍会返回422
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """请求体通过orjson解码的路由，仍由Pydantic模型校验以保留OpenAPI定义"""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
+
+        return custom_route_handler
@@ -2,20 +2,24 @@
 智能体API端点
 """
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
+from app.api.routing import ORJSONRoute
 from app.schemas.agents import (
-    Message,
+    BatchMessageItem,
+    BatchMessageRequest,
+    BatchMessageResponse,
     MessageRequest,
     MessageResponse,
     MessageRole,
     SessionDetailResponse,
-    SessionInfo,
     SessionListResponse,
 )
 from app.services.agents.shipping_fee_agent import shipping_fee_agent
@@ -23,12 +27,12 @@ from app.services.session_service import session_service
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.post(
     '/shipping-fee/chat',
-    response_model=MessageResponse,
+    responses={status.HTTP_200_OK: {'model': MessageResponse}},
     status_code=status.HTTP_200_OK,
     summary='运费险助手对话',
     description='向运费险助手发送消息并获取回复',
@@ -37,44 +41,90 @@ async def chat_with_shipping_fee_agent(request: MessageRequest):
     """
     与运费险助手对话，发送消息并获取回复
     """
+    return ORJSONResponse(content=await _chat(request))
+
+
+async def _chat(request: MessageRequest) -> Dict[str, Any]:
+    """
+    处理一条对话消息并保存到会话历史
+
+    Args:
+        request: 消息请求
+
+    Returns:
+        包含回复内容、会话ID和创建时间的字典
+    """
     session_id = request.session_id
+    user_id = request.user_id
 
     # 如果没有提供会话ID，创建新会话
     if not session_id:
-        session_id = await session_service.create_session(request.user_id)
+        session_id = await session_service.create_session(user_id)
         state = None
     else:
         # 获取现有会话数据
         session_data = await session_service.get_session(session_id)
         if not session_data:
-            session_id = await session_service.create_session(request.user_id)
+            session_id = await session_service.create_session(user_id)
             state = None
         else:
             state = session_data.get('state', None)
+            # 会话索引按会话所属用户刷新，而不是请求中携带的用户
+            user_id = session_data.get('user_id')
 
     # 处理用户消息
-    result = shipping_fee_agent.process_message(request.content, session_id, state)
+    result = await shipping_fee_agent.process_message(request.content, session_id, state)
+    # 本次请求的时间只取一次，消息时间戳与响应时间共用
+    now = datetime.now()
 
-    # 将用户消息和助手回复保存到会话历史
-    await session_service.add_message(
+    # 将用户消息和助手回复一次性保存到会话历史
+    await session_service.add_messages_bulk(
         session_id,
-        {'role': MessageRole.USER, 'content': request.content},
+        [
+            {'role': MessageRole.USER, 'content': request.content},
+            {'role': MessageRole.ASSISTANT, 'content': result['reply']},
+        ],
         result['state'],  # 更新状态
+        now=now,
+        user_id=user_id,
     )
 
-    # 保存助手回复
-    await session_service.add_message(
-        session_id,
-        {'role': MessageRole.ASSISTANT, 'content': result['reply']},
-        result['state'],  # 更新状态
-    )
+    return {'reply': result['reply'], 'session_id': session_id, 'created_at': now}
 
-    return MessageResponse(reply=result['reply'], session_id=session_id, created_at=datetime.now())
+
+@router.post(
+    '/batch',
+    responses={status.HTTP_200_OK: {'model': BatchMessageResponse}},
+    status_code=status.HTTP_200_OK,
+    summary='批量对话',
+    description='一次请求向运费险助手发送多条消息，不同会话的消息并发处理',
+)
+async def batch_chat_with_shipping_fee_agent(request: BatchMessageRequest):
+    """
+    批量处理对话消息，单条消息失败不影响其他消息
+    """
+    # 同一会话的消息依赖前一条消息的状态，按顺序处理；不同会话之间并发处理
+    groups: Dict[Any, List[Tuple[int, BatchMessageItem]]] = {}
+    for index, item in enumerate(request.requests):
+        groups.setdefault(item.session_id or index, []).append((index, item))
+
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(request.requests)
+
+    async def run_group(items: List[Tuple[int, BatchMessageItem]]) -> None:
+        for index, item in items:
+            try:
+                responses[index] = {'id': item.id, **await _chat(item)}
+            except Exception as e:
+                logger.error(f'批量对话消息处理失败: id={item.id}, error={e}')
+                responses[index] = {'id': item.id, 'error': '消息处理失败'}
+
+    await asyncio.gather(*(run_group(items) for items in groups.values()))
+    return ORJSONResponse(content={'responses': responses})
 
 
 @router.get(
     '/sessions',
-    response_model=SessionListResponse,
+    responses={status.HTTP_200_OK: {'model': SessionListResponse}},
     status_code=status.HTTP_200_OK,
     summary='获取会话列表',
     description='获取用户的会话列表',
@@ -85,28 +135,13 @@ async def list_sessions(
     skip: int = Query(0, ge=0, description='跳过数量'),
 ):
     """获取会话列表"""
-    # 这里需要实现从Redis中获取会话列表的逻辑
-    # 简化实现，实际应用需要根据Redis的存储结构进行查询
-
-    # 示例返回
-    return SessionListResponse(
-        sessions=[
-            # 示例数据，实际应用需要从Redis获取
-            SessionInfo(
-                id='session-1',
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
-                user_id=user_id or 'anonymous',
-                message_count=5,
-            )
-        ],
-        total=1,
-    )
+    sessions, total = await session_service.list_user_sessions(user_id, limit=limit, skip=skip)
+    return ORJSONResponse(content={'sessions': sessions, 'total': total})
 
 
 @router.get(
     '/sessions/{session_id}',
-    response_model=SessionDetailResponse,
+    responses={status.HTTP_200_OK: {'model': SessionDetailResponse}},
     status_code=status.HTTP_200_OK,
     summary='获取会话详情',
     description='获取特定会话的详细信息和消息历史',
@@ -117,28 +152,16 @@ async def get_session_detail(session_id: str):
     if not session_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='会话不存在')
 
-    # 转换为API响应模型
-    messages = []
-    for msg in session_data.get('messages', []):
-        role = msg.get('role')
-        content = msg.get('content')
-        timestamp_str = msg.get('timestamp')
-
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str) if timestamp_str else datetime.now()
-        except ValueError:
-            timestamp = datetime.now()
-
-        messages.append(Message(role=role, content=content, timestamp=timestamp))
-
-    return SessionDetailResponse(
-        id=session_id,
-        created_at=datetime.fromisoformat(session_data.get('created_at', datetime.now().isoformat())),
-        updated_at=datetime.fromisoformat(session_data.get('updated_at', datetime.now().isoformat()))
-        if 'updated_at' in session_data
-        else None,
-        user_id=session_data.get('user_id'),
-        messages=messages,
+    # 直接构造响应字典，跳过响应模型的校验和jsonable_encoder
+    # 存储中的消息已是API所需的结构(role/content/ISO时间戳)，原样交给orjson序列化
+    return ORJSONResponse(
+        content={
+            'id': session_id,
+            'created_at': session_data.get('created_at') or datetime.now().isoformat(),
+            'updated_at': session_data.get('updated_at'),
+            'user_id': session_data.get('user_id'),
+            'messages': session_data.get('messages', []),
+        }
     )
 
 
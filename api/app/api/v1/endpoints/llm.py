@@ -2,20 +2,24 @@
 大模型问答API端点
 """
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import orjson
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from app.api.routing import ORJSONRoute
 from app.schemas.agents import MessageRole
-from app.services.llm_service import get_llm_response
+from app.services.llm_service import LLMStreamError, get_llm_response, get_llm_response_stream
 from app.services.session_service import session_service
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 
 # 大模型问答请求模型
@@ -35,9 +39,54 @@ class LLMQuestionResponse(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description='创建时间')
 
 
+async def _load_session_context(
+    request: LLMQuestionRequest,
+) -> Tuple[str, Optional[str], Optional[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    获取或创建会话，并提取需要带给大模型的对话历史
+
+    Returns:
+        (会话ID, 会话所属用户ID, 会话状态, 对话历史)
+    """
+    session_id = request.session_id
+    user_id = request.user_id
+    conversation_history = []
+
+    # 如果没有提供会话ID，创建新会话
+    if not session_id:
+        session_id = await session_service.create_session(user_id)
+        state = None
+    else:
+        # 获取现有会话数据
+        session_data = await session_service.get_session(session_id)
+        if not session_data:
+            session_id = await session_service.create_session(user_id)
+            state = None
+        else:
+            state = session_data.get('state', None)
+            user_id = session_data.get('user_id')
+
+            # 如果需要包含历史对话，从会话中提取
+            if request.include_history and 'messages' in session_data:
+                # 提取对话历史
+                messages = session_data.get('messages', [])
+                # 限制历史消息数量，避免超出token限制
+                max_turns = min(request.max_history_turns * 2, len(messages))
+                recent_messages = messages[-max_turns:] if max_turns > 0 else []
+
+                # 转换为LLM API所需的格式
+                for msg in recent_messages:
+                    role = msg.get('role', '').lower()
+                    # 仅包含用户和助手的消息
+                    if role in ['user', 'assistant']:
+                        conversation_history.append({'role': role, 'content': msg.get('content', '')})
+
+    return session_id, user_id, state, conversation_history
+
+
 @router.post(
     '/question',
-    response_model=LLMQuestionResponse,
+    responses={status.HTTP_200_OK: {'model': LLMQuestionResponse}},
     status_code=status.HTTP_200_OK,
     summary='大模型问答',
     description='向大模型提问并获取回答',
@@ -49,72 +98,93 @@ async def ask_llm_question(request: LLMQuestionRequest):
     接收用户问题，调用OpenAI API获取回答，并保存到会话历史中
     """
     try:
-        session_id = request.session_id
-        conversation_history = []
-
-        # 如果没有提供会话ID，创建新会话
-        if not session_id:
-            session_id = await session_service.create_session(request.user_id)
-            state = None
-        else:
-            # 获取现有会话数据
-            session_data = await session_service.get_session(session_id)
-            if not session_data:
-                session_id = await session_service.create_session(request.user_id)
-                state = None
-            else:
-                state = session_data.get('state', None)
-
-                # 如果需要包含历史对话，从会话中提取
-                if request.include_history and 'messages' in session_data:
-                    # 提取对话历史
-                    messages = session_data.get('messages', [])
-                    # 限制历史消息数量，避免超出token限制
-                    max_turns = min(request.max_history_turns * 2, len(messages))
-                    recent_messages = messages[-max_turns:] if max_turns > 0 else []
-
-                    # 转换为LLM API所需的格式
-                    for msg in recent_messages:
-                        role = msg.get('role', '').lower()
-                        # 仅包含用户和助手的消息
-                        if role in ['user', 'assistant']:
-                            conversation_history.append({'role': role, 'content': msg.get('content', '')})
+        session_id, user_id, state, conversation_history = await _load_session_context(request)
 
         # 获取模型参数
         model_params = request.model_params or {}
 
-        # 调用大模型获取回答，传入对话历史
-        answer = await get_llm_response(request.question, model_params, conversation_history)
-
-        # 将用户问题保存到会话历史
-        await session_service.add_message(
-            session_id,
-            {'role': MessageRole.USER, 'content': request.question},
-            state,  # 更新状态
+        # 用户问题的保存不依赖模型回答，与大模型调用并行进行
+        user_write = asyncio.create_task(
+            session_service.add_message(
+                session_id, {'role': MessageRole.USER, 'content': request.question}, state, user_id=user_id
+            )
         )
-
-        # 保存模型回答
-        await session_service.add_message(
+        try:
+            # 调用大模型获取回答，传入对话历史
+            answer = await get_llm_response(request.question, model_params, conversation_history)
+        finally:
+            # 用户问题必须先于模型回答追加到会话，保证消息顺序
+            await user_write
+        # 本次请求的时间只取一次，会话活动时间与响应时间共用
+        now = datetime.now()
+
+        # 保存模型回答，并同时更新会话状态和活动时间
+        await session_service.add_messages_bulk(
             session_id,
-            {'role': MessageRole.ASSISTANT, 'content': answer},
+            [{'role': MessageRole.ASSISTANT, 'content': answer}],
             state,  # 更新状态
+            data={'last_activity': now.isoformat()},
+            now=now,
+            user_id=user_id,
         )
 
-        # 更新会话状态
-        await session_service.update_session(
-            session_id=session_id,
-            data={
-                'updated_at': datetime.now().isoformat(),
-                'last_activity': datetime.now().isoformat(),
-            },
-        )
-
-        return LLMQuestionResponse(
-            reply=answer,
-            session_id=session_id,
-            created_at=datetime.now(),
+        return ORJSONResponse(
+            content={
+                'reply': answer,
+                'session_id': session_id,
+                'created_at': now,
+            }
         )
     except Exception as e:
         # 记录错误并返回适当的错误消息
         logger.error(f'Error in LLM question: {str(e)}')
         raise HTTPException(status_code=500, detail=f'处理问题时发生错误: {str(e)}')
+
+
+@router.post(
+    '/question/stream',
+    status_code=status.HTTP_200_OK,
+    summary='大模型流式问答',
+    description='向大模型提问，以SSE(text/event-stream)逐段返回回答',
+)
+async def ask_llm_question_stream(request: LLMQuestionRequest):
+    """
+    向大模型提问并以流式方式返回回答
+
+    每个回答片段作为一条 data: {"delta": "..."} 事件发送，回答结束后发送一条包含完整回答和会话ID的事件，
+    完整回答在流结束时保存到会话历史；调用大模型失败时发送一条 event: error 事件并结束，不保存回答
+    """
+    session_id, user_id, state, conversation_history = await _load_session_context(request)
+    model_params = request.model_params or {}
+
+    # 在开始输出前保存用户问题
+    await session_service.add_message(
+        session_id, {'role': MessageRole.USER, 'content': request.question}, state, user_id=user_id
+    )
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        chunks = []
+        try:
+            async for delta in get_llm_response_stream(request.question, model_params, conversation_history):
+                chunks.append(delta)
+                yield b'data: ' + orjson.dumps({'delta': delta}) + b'\n\n'
+        except LLMStreamError as e:
+            # 已发送的片段不是完整回答，不写入会话历史
+            yield b'event: error\ndata: ' + orjson.dumps({'error': str(e), 'session_id': session_id}) + b'\n\n'
+            return
+
+        answer = ''.join(chunks).strip()
+        now = datetime.now()
+        await session_service.add_messages_bulk(
+            session_id,
+            [{'role': MessageRole.ASSISTANT, 'content': answer}],
+            state,  # 更新状态
+            data={'last_activity': now.isoformat()},
+            now=now,
+            user_id=user_id,
+        )
+        yield b'data: ' + orjson.dumps(
+            {'reply': answer, 'session_id': session_id, 'created_at': now, 'done': True}
+        ) + b'\n\n'
+
+    return StreamingResponse(event_stream(), media_type='text/event-stream')
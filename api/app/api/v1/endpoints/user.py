@@ -27,7 +27,7 @@ async def read_user(user_id: str):
     """获取用户信息"""
     logger.info("User info requested")
     
-    return UserResponse(
+    return UserResponse.model_construct(
         status="ok",
         user_id=user_id,
     )
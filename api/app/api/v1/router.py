@@ -16,12 +16,3 @@ api_router.include_router(llm.router, prefix='/llm', tags=['LLM'])  # 包含大
 
 # 这里可以继续添加其他API端点的路由
 # 例如：api_router.include_router(users.router, prefix="/users", tags=["Users"])
-
-# 这里可以继续添加其他API端点的路由
-# 例如：api_router.include_router(users.router, prefix="/users", tags=["Users"])
-
-# 这里可以继续添加其他API端点的路由
-# 例如：api_router.include_router(users.router, prefix="/users", tags=["Users"])
-
-# 这里可以继续添加其他API端点的路由
-# 例如：api_router.include_router(users.router, prefix="/users", tags=["Users"])
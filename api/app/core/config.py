@@ -1,7 +1,7 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional, Tuple
 import os
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -14,6 +14,9 @@ class Settings(BaseSettings):
     # 服务器配置
     SERVER_HOST: str = '0.0.0.0'
     SERVER_PORT: int = 8000
+    WORKERS: int = os.cpu_count() or 1  # 工作进程数，调试模式或使用内存存储时固定为1，见EFFECTIVE_WORKERS
+    LIMIT_CONCURRENCY: int = 1000  # 每个工作进程的最大并发连接数，超出时返回503
+    TIMEOUT_KEEP_ALIVE: int = 30  # 空闲keep-alive连接的保持时间(秒)
 
     # 日志配置
     LOG_LEVEL: str = 'INFO'
@@ -29,31 +32,44 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 256  # 连接池最大连接数，超出时请求直接报错，需覆盖高峰并发
 
     # 添加LLM配置
     LLM_API_KEY: Optional[str] = None
     LLM_API_BASE: Optional[str] = ''
     LLM_MODEL_NAME: str = ''
+    LLM_CONTEXT_TOKEN_BUDGET: int = 2000  # 发送给智能体模型的对话历史token上限
+
+    # 智能体缓存配置，0表示关闭；仅适用于结果确定、可在有效期内复用的工具和模型调用
+    AGENT_TOOL_CACHE_TTL_SECONDS: int = 0  # 相同工具和参数的调用结果缓存时间(秒)
+    AGENT_RESPONSE_CACHE_TTL_SECONDS: int = 0  # 相同提示和对话历史的模型回复缓存时间(秒)
 
     # 会话配置
     SESSION_TTL_SECONDS: int = 3600 * 24  # 默认会话保存24小时
+    SESSION_CACHE_TTL_SECONDS: float = 0  # 进程内会话缓存有效期(秒)，默认0关闭；仅适用于单实例单进程部署，多个工作进程时自动关闭
 
-    class Config:
-        case_sensitive = True
-        env_file = '.env'
-        env_file_encoding = 'utf-8'
+    model_config = SettingsConfigDict(case_sensitive=True, env_file='.env', env_file_encoding='utf-8')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # 确保_dynamic_configs被初始化为实例属性
         self._dynamic_configs = {}
+        # 启动时解析一次CORS来源，之后直接复用
+        object.__setattr__(
+            self,
+            '_cors_origins_cache',
+            tuple(origin.strip() for origin in (self.CORS_ORIGINS_STR or '').split(',') if origin.strip()),
+        )
+
+    @property
+    def CORS_ORIGINS(self) -> Tuple[str, ...]:
+        """将逗号分隔的字符串转换为元组"""
+        return self._cors_origins_cache
 
     @property
-    def CORS_ORIGINS(self) -> List[str]:
-        """将逗号分隔的字符串转换为列表"""
-        if not self.CORS_ORIGINS_STR:
-            return []
-        return [origin.strip() for origin in self.CORS_ORIGINS_STR.split(',') if origin.strip()]
+    def EFFECTIVE_WORKERS(self) -> int:
+        """实际启动的工作进程数：自动重载只支持单进程，内存存储的会话数据无法跨进程共享，同样只能使用单进程"""
+        return 1 if self.DEBUG or self.USE_MEMORY_STORAGE else max(self.WORKERS, 1)
 
     def get_config(self, key: str, default: Any = None) -> Any:
         """
@@ -77,23 +93,16 @@ class Settings(BaseSettings):
                 return False
             return env_value
                 
-        # 检查常规属性
-        if hasattr(self, key) and getattr(self, key) is not None:
-            return getattr(self, key)
-
-        # 检查大写属性
-        if hasattr(self, env_key) and getattr(self, env_key) is not None:
-            return getattr(self, env_key)
-
-        # 确保_dynamic_configs存在，防止递归
-        dynamic_configs = getattr(self, '_dynamic_configs', {})
-
-        # 检查动态配置
-        if key in dynamic_configs:
-            return dynamic_configs[key]
+        # 直接读取实例字典中的字段值，避免hasattr/getattr落入__getattr__慢路径
+        values = self.__dict__
+        value = values.get(key)
+        if value is None:
+            value = values.get(env_key)
+        if value is not None:
+            return value
 
-        # 返回默认值
-        return default
+        # 检查动态配置，_dynamic_configs已在__init__中初始化
+        return self._dynamic_configs.get(key, default)
 
     def __getattr__(self, name: str) -> Any:
         """
@@ -112,8 +121,8 @@ class Settings(BaseSettings):
         if name == '_dynamic_configs':
             raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
 
-        # 安全获取_dynamic_configs
-        dynamic_configs = getattr(self, '_dynamic_configs', {})
+        # 通过实例字典获取_dynamic_configs，避免再次触发__getattr__
+        dynamic_configs = self.__dict__.get('_dynamic_configs', {})
 
         # 检查动态配置
         if name in dynamic_configs:
@@ -134,13 +143,12 @@ class Settings(BaseSettings):
         """
         # 收集预定义的属性，排除私有属性和方法
         result = {}
-        for key in self.__class__.__fields__:
+        for key in self.__class__.model_fields:
             if not key.startswith('_'):
                 result[key] = getattr(self, key)
 
-        # 添加动态配置，确保_dynamic_configs存在
-        dynamic_configs = getattr(self, '_dynamic_configs', {})
-        result.update(dynamic_configs)
+        # 添加动态配置
+        result.update(self._dynamic_configs)
 
         return result
 
@@ -1,67 +1,81 @@
 import logging
-import sys
-from typing import Optional
+import logging.config
+from functools import lru_cache
 
 import structlog
 
 from app.core.config import settings
 
+# structlog处理器链，模块加载时构建一次，重复配置时直接复用
+_PROCESSORS = [
+    # 添加日志级别名称
+    structlog.stdlib.add_log_level,
+    # 添加ISO格式的UTC时间戳，避免自定义格式的strftime开销
+    structlog.processors.TimeStamper(fmt="iso", utc=True),
+]
+if settings.DEBUG:
+    # 调用者信息需要回溯调用栈，仅在调试时添加
+    _PROCESSORS.append(
+        structlog.processors.CallsiteParameterAdder(
+            [
+                structlog.processors.CallsiteParameter.FILENAME,
+                structlog.processors.CallsiteParameter.FUNC_NAME,
+                structlog.processors.CallsiteParameter.LINENO,
+            ]
+        )
+    )
+# 以JSON格式或漂亮格式渲染日志
+_PROCESSORS.append(structlog.processors.JSONRenderer() if not settings.DEBUG else structlog.dev.ConsoleRenderer())
+
+
+@lru_cache(maxsize=None)
+def _get_log_level() -> int:
+    """解析配置中的日志级别"""
+    return getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+
+
 def configure_logging() -> None:
     """配置日志系统"""
-    
-    # 设置基本日志级别
-    log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
-    # 配置Python标准库日志
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=log_level,
-        force=True,  # 强制重新配置，避免重复配置的问题
-    )
-    
-    # 确保所有日志处理器都有正确的级别
-    for name in logging.root.manager.loggerDict:
-        logger = logging.getLogger(name)
-        if logger.level == logging.NOTSET:
-            logger.setLevel(log_level)
-    
+
+    log_level = _get_log_level()
+
+    # 提高一些啰嗦的库的日志级别
+    noisy_loggers = {}
+    if log_level > logging.INFO:
+        noisy_loggers = {
+            "uvicorn.access": {"level": logging.WARNING},
+            "sqlalchemy.engine": {"level": logging.WARNING},
+        }
+
+    # 配置Python标准库日志，未单独设置级别的logger继承根级别
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {"plain": {"format": "%(message)s"}},
+        "handlers": {
+            "stdout": {
+                "class": "logging.StreamHandler",
+                "stream": "ext://sys.stdout",
+                "formatter": "plain",
+            },
+        },
+        "root": {"level": log_level, "handlers": ["stdout"]},
+        "loggers": noisy_loggers,
+    })
+
     # 配置structlog
     structlog.configure(
-        processors=[
-            # 添加日志级别名称
-            structlog.stdlib.add_log_level,
-            # 添加调用者信息
-            structlog.processors.CallsiteParameterAdder(
-                [
-                    structlog.processors.CallsiteParameter.FILENAME,
-                    structlog.processors.CallsiteParameter.FUNC_NAME,
-                    structlog.processors.CallsiteParameter.LINENO,
-                ]
-            ),
-            # 按日志级别过滤 - 使用stdlib中的过滤器
-            structlog.stdlib.filter_by_level,
-            # 添加时间戳
-            structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S"),
-            # 以JSON格式或漂亮格式渲染日志
-            structlog.processors.JSONRenderer() if not settings.DEBUG else structlog.dev.ConsoleRenderer(),
-        ],
+        processors=_PROCESSORS,
         # 将structlog与标准库日志集成
         logger_factory=structlog.stdlib.LoggerFactory(),
         # 缓存logger实例
         cache_logger_on_first_use=True,
-        # 包装标准库的logger
-        wrapper_class=structlog.stdlib.BoundLogger,
-        # 确保传递日志级别
+        # 低于配置级别的日志在调用处直接丢弃，无需经过处理器链
+        wrapper_class=structlog.make_filtering_bound_logger(log_level),
         context_class=dict,
     )
-    
-    # 设置第三方库的日志级别
-    if log_level > logging.INFO:
-        # 提高一些啰嗦的库的日志级别
-        logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-        logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
-def get_logger(name: str) -> structlog.stdlib.BoundLogger:
+
+def get_logger(name: str) -> structlog.typing.FilteringBoundLogger:
     """获取结构化日志记录器"""
     return structlog.get_logger(name)
@@ -1,10 +1,13 @@
 import logging
-import threading
 import time
-from typing import Optional, Dict, Any, Protocol
-import asyncio
+from typing import Optional, Dict, Any, List, Protocol, Tuple
+import heapq
 import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
 from app.core.config import settings
 
@@ -34,64 +37,164 @@ class StorageClientProtocol(Protocol):
         """删除键"""
         ...
     
+    async def expire(self, key: str, seconds: int) -> bool:
+        """设置键的过期时间"""
+        ...
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        """向有序集合添加成员"""
+        ...
+
+    async def zrem(self, key: str, *members: str) -> int:
+        """从有序集合删除成员"""
+        ...
+
+    async def zremrangebyscore(self, key: str, min_score: Any, max_score: Any) -> int:
+        """删除分数在指定闭区间内的有序集合成员"""
+        ...
+
+    async def zrevrange(self, key: str, start: int, end: int) -> List[str]:
+        """按分数从高到低获取有序集合成员"""
+        ...
+
+    async def zcard(self, key: str) -> int:
+        """获取有序集合成员数量"""
+        ...
+
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        """设置哈希表字段"""
+        ...
+
+    async def hgetall(self, key: str) -> Dict[str, Any]:
+        """获取哈希表全部字段"""
+        ...
+
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[Any]]:
+        """批量获取哈希表字段"""
+        ...
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        """向列表尾部追加元素"""
+        ...
+
+    async def lrange(self, key: str, start: int, end: int) -> List[Any]:
+        """获取列表指定范围的元素"""
+        ...
+
+    async def llen(self, key: str) -> int:
+        """获取列表长度"""
+        ...
+
     async def ping(self) -> bool:
         """测试连接"""
         ...
 
+    def pipeline(self, transaction: bool = False) -> Any:
+        """创建命令管道，在一次往返中批量执行多条命令"""
+        ...
+
+
+class MemoryPipeline:
+    """内存存储的命令管道，模拟redis-py的Pipeline接口"""
+
+    def __init__(self, client: 'MemoryStorageClient') -> None:
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> 'MemoryPipeline':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        # 将命令加入队列，execute时按顺序执行
+        def queue(*args, **kwargs) -> 'MemoryPipeline':
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> List[Any]:
+        """按顺序执行队列中的命令并返回结果列表"""
+        commands, self._commands = self._commands, []
+        return [await getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class RedisPipeline:
+    """redis-py Pipeline的封装，执行失败时记录日志并返回None"""
+
+    def __init__(self, pipeline: Optional[Any]) -> None:
+        self._pipeline = pipeline
+
+    async def __aenter__(self) -> 'RedisPipeline':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._pipeline is not None:
+            await self._pipeline.reset()
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs) -> 'RedisPipeline':
+            if self._pipeline is not None:
+                getattr(self._pipeline, name)(*args, **kwargs)
+            return self
+
+        return queue
+
+    async def execute(self) -> Optional[List[Any]]:
+        """执行队列中的命令，Redis不可用时返回None"""
+        if self._pipeline is None:
+            return None
+        try:
+            return await self._pipeline.execute()
+        except RedisError as e:
+            logger.error(f'Redis pipeline error: {e}')
+            return None
+
 
 class MemoryStorageClient:
     """基于内存的存储客户端，模拟Redis功能"""
 
     def __init__(self) -> None:
-        self._storage: Dict[str, Any] = {}
-        self._expiry: Dict[str, float] = {}  # 存储过期时间
+        # 值与过期时间存放在同一个字典中: key -> (value, expire_at)，expire_at为None表示永不过期
+        self._storage: Dict[str, Tuple[Any, Optional[float]]] = {}
+        # 过期时间最小堆: (expire_at, key)，键被覆盖后旧条目在弹出时按时间戳比对丢弃
+        self._expiry_heap: List[Tuple[float, str]] = []
         self._initialized = False
-        self._cleanup_task = None
 
     async def initialize(self) -> None:
         """初始化内存存储"""
         try:
             self._initialized = True
             self._storage = {}
-            self._expiry = {}
+            self._expiry_heap = []
             logger.info('Memory storage initialized successfully')
-            
-            # 启动定期清理过期键的任务
-            self._cleanup_task = asyncio.create_task(self._cleanup_expired_keys())
         except Exception as e:
             logger.error(f'Failed to initialize memory storage: {e}')
             self._initialized = False
             raise
 
-    async def _cleanup_expired_keys(self) -> None:
-        """定期清理过期的键"""
-        while True:
-            try:
-                current_time = time.time()
-                expired_keys = [k for k, v in self._expiry.items() if v <= current_time]
-                
-                for key in expired_keys:
-                    del self._storage[key]
-                    del self._expiry[key]
-                
-                if expired_keys:
-                    logger.debug(f'Cleaned up {len(expired_keys)} expired keys')
-            except Exception as e:
-                logger.error(f'Error during cleanup: {e}')
-            
-            await asyncio.sleep(60)  # 每分钟检查一次
+    def _evict_expired_keys(self) -> None:
+        """清理已到期的键，只处理已到期的堆顶条目；在写入时调用，无需后台任务"""
+        current_time = time.monotonic()
+        expired_count = 0
+
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            expire_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._storage.get(key)
+            # 仅当键的过期时间仍是该条目时才删除，避免误删被重新设置的键
+            if entry is not None and entry[1] == expire_at:
+                del self._storage[key]
+                expired_count += 1
+
+        if expired_count:
+            logger.debug(f'Cleaned up {expired_count} expired keys')
 
     async def close(self) -> None:
         """关闭存储客户端"""
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
-        
         self._storage = {}
-        self._expiry = {}
+        self._expiry_heap = []
         self._initialized = False
         logger.info('Memory storage closed')
 
@@ -100,13 +203,17 @@ class MemoryStorageClient:
         if not self._initialized:
             return None
         
+        entry = self._storage.get(key)
+        if entry is None:
+            return None
+
         # 检查是否过期
-        if key in self._expiry and time.time() > self._expiry[key]:
+        value, expire_at = entry
+        if expire_at is not None and expire_at <= time.monotonic():
             del self._storage[key]
-            del self._expiry[key]
             return None
         
-        return self._storage.get(key)
+        return value
 
     async def set(self, key: str, value: str, expire: Optional[int] = None) -> bool:
         """设置键值"""
@@ -114,14 +221,9 @@ class MemoryStorageClient:
             return False
         
         try:
-            self._storage[key] = value
-            
-            # 设置过期时间
-            if expire is not None:
-                self._expiry[key] = time.time() + expire
-            elif key in self._expiry:
-                del self._expiry[key]  # 如果没有指定过期时间，移除之前的过期设置
-            
+            # 未指定过期时间时，同时清除之前的过期设置
+            expire_at = self._schedule_expiry(key, expire) if expire is not None else None
+            self._storage[key] = (value, expire_at)
             return True
         except Exception as e:
             logger.error(f'Memory storage set error: {e}')
@@ -132,48 +234,133 @@ class MemoryStorageClient:
         if not self._initialized:
             return False
         
-        try:
-            if key in self._storage:
-                del self._storage[key]
-            
-            if key in self._expiry:
-                del self._expiry[key]
-            
-            return True
-        except Exception as e:
-            logger.error(f'Memory storage delete error: {e}')
+        self._storage.pop(key, None)
+        return True
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        """设置键的过期时间"""
+        if await self.get(key) is None:
             return False
 
+        self._storage[key] = (self._storage[key][0], self._schedule_expiry(key, seconds))
+        return True
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        """向有序集合添加成员，有序集合以 member -> score 字典存储"""
+        if not self._initialized:
+            return 0
+
+        zset = await self.get(key)
+        if zset is None:
+            zset = {}
+            self._storage[key] = (zset, None)
+        added = len(mapping.keys() - zset.keys())
+        zset.update(mapping)
+        return added
+
+    async def zrem(self, key: str, *members: str) -> int:
+        """从有序集合删除成员"""
+        zset = await self.get(key)
+        if not zset:
+            return 0
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    async def zremrangebyscore(self, key: str, min_score: Any, max_score: Any) -> int:
+        """删除分数在指定闭区间内的有序集合成员，分数支持'-inf'/'+inf'"""
+        zset = await self.get(key)
+        if not zset:
+            return 0
+        low, high = float(min_score), float(max_score)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    async def zrevrange(self, key: str, start: int, end: int) -> List[str]:
+        """按分数从高到低获取有序集合成员，start/end语义与Redis一致(闭区间，支持负数)"""
+        zset = await self.get(key)
+        if not zset:
+            return []
+        members = [member for member, _ in sorted(zset.items(), key=lambda item: (item[1], item[0]), reverse=True)]
+        stop = end + 1 if end >= 0 else len(members) + end + 1
+        return members[start:stop]
+
+    async def zcard(self, key: str) -> int:
+        """获取有序集合成员数量"""
+        zset = await self.get(key)
+        return len(zset) if zset else 0
+
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        """设置哈希表字段，哈希表以 field -> value 字典存储"""
+        if not self._initialized:
+            return 0
+
+        hash_value = await self.get(key)
+        if hash_value is None:
+            hash_value = {}
+            self._storage[key] = (hash_value, None)
+        added = len(mapping.keys() - hash_value.keys())
+        hash_value.update(mapping)
+        return added
+
+    async def hgetall(self, key: str) -> Dict[str, Any]:
+        """获取哈希表全部字段"""
+        hash_value = await self.get(key)
+        return dict(hash_value) if hash_value else {}
+
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[Any]]:
+        """批量获取哈希表字段"""
+        hash_value = await self.get(key) or {}
+        return [hash_value.get(field) for field in fields]
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        """向列表尾部追加元素，列表以Python list存储"""
+        if not self._initialized:
+            return 0
+
+        list_value = await self.get(key)
+        if list_value is None:
+            list_value = []
+            self._storage[key] = (list_value, None)
+        list_value.extend(values)
+        return len(list_value)
+
+    async def lrange(self, key: str, start: int, end: int) -> List[Any]:
+        """获取列表指定范围的元素，start/end语义与Redis一致(闭区间，支持负数)"""
+        list_value = await self.get(key)
+        if not list_value:
+            return []
+        stop = end + 1 if end >= 0 else len(list_value) + end + 1
+        return list_value[start:stop]
+
+    async def llen(self, key: str) -> int:
+        """获取列表长度"""
+        list_value = await self.get(key)
+        return len(list_value) if list_value else 0
+
+    def _schedule_expiry(self, key: str, seconds: int) -> float:
+        """计算过期时间并加入过期堆，顺带清理已到期的键"""
+        self._evict_expired_keys()
+        # 每次刷新过期时间都会留下一个旧条目，旧条目超过存活键数量时按当前过期时间重建堆，
+        # 使堆的大小与存活键数量成正比；须在加入新条目前重建，此时键的新过期时间尚未写入存储
+        if len(self._expiry_heap) >= 2 * len(self._storage):
+            self._expiry_heap = [
+                (expire_at, stored_key)
+                for stored_key, (_, expire_at) in self._storage.items()
+                if expire_at is not None
+            ]
+            heapq.heapify(self._expiry_heap)
+        expire_at = time.monotonic() + seconds
+        heapq.heappush(self._expiry_heap, (expire_at, key))
+        return expire_at
+
     async def ping(self) -> bool:
         """测试连接"""
         return self._initialized
 
-
-class RetryableRedisMixin:
-    """为Redis客户端添加自动重试功能的Mixin"""
-
-    async def execute_command(self, *args, **options):
-        """执行Redis命令并在失败时自动重试"""
-        max_retries = 3
-        last_error = None
-
-        for attempt in range(max_retries):
-            try:
-                return await super().execute_command(*args, **options)
-            except (ConnectionError, TimeoutError) as e:
-                last_error = e
-                if attempt == max_retries - 1:
-                    logger.error(f'Redis operation failed after {max_retries} attempts: {e}')
-                    raise
-                logger.warning(f'Redis operation failed, attempt {attempt + 1}/{max_retries}: {e}')
-                await asyncio.sleep(1)  # 短暂等待后重试
-
-        raise last_error
-
-
-class RetryableRedis(RetryableRedisMixin, redis.Redis):
-    """带有自动重试功能的Redis客户端"""
-    pass
+    def pipeline(self, transaction: bool = False) -> MemoryPipeline:
+        """创建命令管道"""
+        return MemoryPipeline(self)
 
 
 class RedisClient:
@@ -181,7 +368,8 @@ class RedisClient:
 
     def __init__(self) -> None:
         self._redis: Optional[redis.Redis] = None
-        self._keep_alive_thread = None
+        self._pool: Optional[redis.ConnectionPool] = None
+        self._scripts: Dict[str, Any] = {}
 
     async def initialize(self) -> None:
         """初始化Redis连接"""
@@ -192,41 +380,44 @@ class RedisClient:
             password = settings.REDIS_PASSWORD
             db = settings.REDIS_DB
 
-            # 使用RetryableRedis替代标准Redis
-            self._redis = RetryableRedis(
+            # 显式创建连接池，并发请求各自占用连接，避免排队等待同一个socket
+            self._pool = redis.ConnectionPool(
                 host=host,
                 port=port,
                 password=password or None,
                 db=db,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
                 decode_responses=True,
                 socket_timeout=5,
                 socket_connect_timeout=5,
                 health_check_interval=30,
-                retry_on_timeout=True,
+                # 连接或超时错误由redis-py在连接层按指数退避重试，首次等待50ms，最长1s
+                retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), retries=3),
+                retry_on_error=[RedisConnectionError, RedisTimeoutError],
             )
 
+            self._redis = redis.Redis(connection_pool=self._pool, single_connection_client=False)
+            self._scripts = {}
+
             # 测试连接
             await self._redis.ping()
             logger.info(f'Redis connection established successfully to {host}:{port}')
 
-            # 启动保活线程
-            # self._start_keep_alive()
-
         except RedisError as e:
             logger.error(f'Failed to initialize Redis connection: {e}')
             self._redis = None
+            self._pool = None
             raise
 
     async def close(self) -> None:
         """关闭Redis连接"""
         if self._redis:
-            await self._redis.close()
+            await self._redis.aclose()
             logger.info('Redis connection closed')
 
-        if self._keep_alive_thread and self._keep_alive_thread.is_alive():
-            # 在实际代码中，我们无法直接停止守护线程
-            # 这里只是记录日志，线程会随着程序退出而终止
-            logger.info('Redis keep-alive thread will terminate with application')
+        if self._pool:
+            await self._pool.disconnect()
+            self._pool = None
 
     async def get(self, key: str) -> Optional[str]:
         """获取键值"""
@@ -260,6 +451,126 @@ class RedisClient:
             logger.error(f'Redis delete error: {e}')
             return False
 
+    async def expire(self, key: str, seconds: int) -> bool:
+        """设置键的过期时间"""
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.expire(key, seconds))
+        except RedisError as e:
+            logger.error(f'Redis expire error: {e}')
+            return False
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        """向有序集合添加成员"""
+        if not self._redis:
+            return 0
+        try:
+            return await self._redis.zadd(key, mapping)
+        except RedisError as e:
+            logger.error(f'Redis zadd error: {e}')
+            return 0
+
+    async def zrem(self, key: str, *members: str) -> int:
+        """从有序集合删除成员"""
+        if not self._redis or not members:
+            return 0
+        try:
+            return await self._redis.zrem(key, *members)
+        except RedisError as e:
+            logger.error(f'Redis zrem error: {e}')
+            return 0
+
+    async def zremrangebyscore(self, key: str, min_score: Any, max_score: Any) -> int:
+        """删除分数在指定闭区间内的有序集合成员"""
+        if not self._redis:
+            return 0
+        try:
+            return await self._redis.zremrangebyscore(key, min_score, max_score)
+        except RedisError as e:
+            logger.error(f'Redis zremrangebyscore error: {e}')
+            return 0
+
+    async def zrevrange(self, key: str, start: int, end: int) -> List[str]:
+        """按分数从高到低获取有序集合成员"""
+        if not self._redis:
+            return []
+        try:
+            return await self._redis.zrevrange(key, start, end)
+        except RedisError as e:
+            logger.error(f'Redis zrevrange error: {e}')
+            return []
+
+    async def zcard(self, key: str) -> int:
+        """获取有序集合成员数量"""
+        if not self._redis:
+            return 0
+        try:
+            return await self._redis.zcard(key)
+        except RedisError as e:
+            logger.error(f'Redis zcard error: {e}')
+            return 0
+
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        """设置哈希表字段"""
+        if not self._redis or not mapping:
+            return 0
+        try:
+            return await self._redis.hset(key, mapping=mapping)
+        except RedisError as e:
+            logger.error(f'Redis hset error: {e}')
+            return 0
+
+    async def hgetall(self, key: str) -> Dict[str, Any]:
+        """获取哈希表全部字段"""
+        if not self._redis:
+            return {}
+        try:
+            return await self._redis.hgetall(key)
+        except RedisError as e:
+            logger.error(f'Redis hgetall error: {e}')
+            return {}
+
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[Any]]:
+        """批量获取哈希表字段"""
+        if not self._redis or not fields:
+            return [None] * len(fields)
+        try:
+            return await self._redis.hmget(key, fields)
+        except RedisError as e:
+            logger.error(f'Redis hmget error: {e}')
+            return [None] * len(fields)
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        """向列表尾部追加元素"""
+        if not self._redis or not values:
+            return 0
+        try:
+            return await self._redis.rpush(key, *values)
+        except RedisError as e:
+            logger.error(f'Redis rpush error: {e}')
+            return 0
+
+    async def lrange(self, key: str, start: int, end: int) -> List[Any]:
+        """获取列表指定范围的元素"""
+        if not self._redis:
+            return []
+        try:
+            return await self._redis.lrange(key, start, end)
+        except RedisError as e:
+            logger.error(f'Redis lrange error: {e}')
+            return []
+
+    async def llen(self, key: str) -> int:
+        """获取列表长度"""
+        if not self._redis:
+            return 0
+        try:
+            return await self._redis.llen(key)
+        except RedisError as e:
+            logger.error(f'Redis llen error: {e}')
+            return 0
+
     async def ping(self) -> bool:
         """测试连接"""
         if not self._redis:
@@ -270,43 +581,27 @@ class RedisClient:
             logger.error(f'Redis ping error: {e}')
             return False
 
-    def _start_keep_alive(self, interval: int = 60) -> None:
-        """启动Redis连接保活线程"""
-        if self._keep_alive_thread and self._keep_alive_thread.is_alive():
-            logger.debug('Keep-alive thread already running')
-            return
-
-        async def _ping_redis():
-            while self._redis:
-                try:
-                    await self._redis.ping()
-                    await asyncio.sleep(interval)
-                except Exception as e:
-                    # 使用安全的日志记录方式
-                    print(f"Redis keep-alive ping failed: {e}")
-                    logging.error(f"Redis keep-alive ping failed: {e}")
-                    await asyncio.sleep(5)  # 失败后短暂等待再重试
-
-        def _run_ping_loop():
-            import asyncio
-
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(_ping_redis())
-            except Exception as e:
-                print(f"Error in Redis ping loop: {e}")
-                logging.error(f"Error in Redis ping loop: {e}")
-
-        self._keep_alive_thread = threading.Thread(target=_run_ping_loop, daemon=True)
-        self._keep_alive_thread.start()
-        logger.debug('Redis keep-alive thread started')
+    def pipeline(self, transaction: bool = False) -> RedisPipeline:
+        """创建命令管道，多条命令合并为一次网络往返"""
+        return RedisPipeline(self._redis.pipeline(transaction=transaction) if self._redis else None)
 
+    async def eval_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """执行Lua脚本，脚本注册后按SHA缓存，后续调用使用EVALSHA"""
+        if not self._redis:
+            return None
+        try:
+            registered = self._scripts.get(script)
+            if registered is None:
+                registered = self._redis.register_script(script)
+                self._scripts[script] = registered
+            return await registered(keys=keys, args=args)
+        except RedisError as e:
+            logger.error(f'Redis script error: {e}')
+            return None
 
-# 根据环境变量USE_MEMORY_STORAGE决定使用哪种存储客户端
-use_memory = settings.get_config('USE_MEMORY_STORAGE', True)
 
-if use_memory:
+# 根据环境变量USE_MEMORY_STORAGE决定使用哪种存储客户端
+if settings.USE_MEMORY_STORAGE:
     logger.info("Using in-memory storage client")
     redis_client = MemoryStorageClient()
 else:
@@ -1,10 +1,12 @@
 import logging
+import sys
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi_mcp import FastApiMCP
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # 首先导入配置
 from app.core.config import settings
@@ -18,6 +20,8 @@ configure_logging()
 # 然后导入依赖于日志配置的其他模块
 from app.api.v1.router import api_router
 from app.db.redis_client import redis_client
+from app.services.agents.shipping_fee_agent import shipping_fee_agent
+from app.services.llm_service import close_http_client
 
 # 获取logger实例
 logger = logging.getLogger(__name__)
@@ -39,6 +43,9 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f'Storage initialization failed: {e}')
 
+        # 预加载token计数使用的编码器，避免首次对话时在事件循环中同步加载
+        await shipping_fee_agent.warm_up()
+
         yield  # 应用程序运行时
 
         # 关闭事件
@@ -49,6 +56,9 @@ async def lifespan(app: FastAPI):
             await redis_client.close()
         except Exception as e:
             logger.error(f'Storage shutdown failed: {e}')
+
+        # 关闭到LLM服务的HTTP连接
+        await close_http_client()
     except Exception as e:
         logger.exception(f'Unexpected error in lifespan: {e}')
         # 即使出现异常也要确保生成器继续
@@ -63,21 +73,16 @@ app = FastAPI(
     docs_url=f'{settings.API_PREFIX}/docs',
     openapi_url=f'{settings.API_PREFIX}/openapi.json',
     lifespan=lifespan,  # 使用 lifespan 上下文管理器
+    default_response_class=ORJSONResponse,  # 使用orjson序列化响应
 )
 
-mcp = FastApiMCP(
-    app,
-    # Optional parameters
-    name='Native AI API MCP',
-    description='My API description',
-    base_url='http://localhost:8000',
-)
-mcp.mount()
 # 设置跨域
 # 从配置中获取CORS配置
 cors_origins = settings.CORS_ORIGINS
 logger.info(f'Configuring CORS with origins: {cors_origins}')
 
+# 中间件说明：CORSMiddleware是纯ASGI中间件，也是当前唯一的中间件；
+# 后添加的中间件位于外层，新增中间件请同样实现为纯ASGI，避免BaseHTTPMiddleware在每个请求上的额外开销
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
@@ -88,13 +93,30 @@ app.add_middleware(
 
 # 包含API路由
 app.include_router(api_router, prefix=settings.API_PREFIX)
-mcp.setup_server()
+
+# 在API路由之后创建并挂载MCP服务：构造时一次性读取完整的API定义，
+# MCP路由只挂在/mcp下且排在业务路由之后，业务请求的路由匹配不会先经过MCP路由
+mcp = FastApiMCP(
+    app,
+    # Optional parameters
+    name='Native AI API MCP',
+    description='My API description',
+    base_url='http://localhost:8000',
+)
+mcp.mount(mount_path='/mcp')
+
 if __name__ == '__main__':
     uvicorn.run(
         'app.main:app',
         host=settings.SERVER_HOST,
         port=settings.SERVER_PORT,
         reload=settings.DEBUG,
+        workers=settings.EFFECTIVE_WORKERS,
+        limit_concurrency=settings.LIMIT_CONCURRENCY,
+        timeout_keep_alive=settings.TIMEOUT_KEEP_ALIVE,
         log_level='debug' if settings.DEBUG else 'info',
+        # 显式使用C实现的事件循环和HTTP解析器；uvloop不支持Windows，该平台回退到asyncio
+        loop='uvloop' if sys.platform != 'win32' else 'asyncio',
+        http='httptools',
     )
 
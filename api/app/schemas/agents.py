@@ -59,3 +59,27 @@ class SessionDetailResponse(BaseModel):
     updated_at: Optional[datetime] = Field(None, description="最后更新时间")
     user_id: Optional[str] = Field(None, description="用户ID")
     messages: List[Message] = Field(default_factory=list, description="消息历史")
+
+
+class BatchMessageItem(MessageRequest):
+    """批量消息请求中的单条消息"""
+    id: str = Field(..., description="调用方指定的请求标识，用于对应响应")
+
+
+class BatchMessageRequest(BaseModel):
+    """批量消息请求模型"""
+    requests: List[BatchMessageItem] = Field(..., min_length=1, max_length=20, description="消息列表，最多20条")
+
+
+class BatchMessageResult(BaseModel):
+    """批量消息中单条消息的处理结果"""
+    id: str = Field(..., description="请求标识")
+    reply: Optional[str] = Field(None, description="助手回复内容")
+    session_id: Optional[str] = Field(None, description="会话ID")
+    created_at: Optional[datetime] = Field(None, description="创建时间")
+    error: Optional[str] = Field(None, description="处理失败时的错误信息")
+
+
+class BatchMessageResponse(BaseModel):
+    """批量消息响应模型"""
+    responses: List[BatchMessageResult] = Field(default_factory=list, description="按请求顺序排列的处理结果")
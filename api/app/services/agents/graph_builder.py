@@ -1,6 +1,7 @@
 """
 LangGraph图构建器模块
 """
+import inspect
 import logging
 from typing import Any, Callable, Dict, List, Type
 
@@ -16,6 +17,8 @@ def build_graph(
     main_node_name: str = "主节点",
     tool_handlers: Dict[str, Callable] = None,
     tools: List[Callable] = None,
+    tool_cache: Any = None,
+    tool_cache_ttl: int = 0,
 ) -> graph.Graph:
     """
     构建LangGraph任务图
@@ -26,10 +29,15 @@ def build_graph(
         main_node_name: 主节点名称
         tool_handlers: 工具处理函数字典，键为工具名称，值为处理函数
         tools: 可用工具函数列表
+        tool_cache: 工具结果缓存(提供make_key/get_cached_data/cache_data，如CacheService)，仅用于按工具列表自动创建的处理函数
+        tool_cache_ttl: 工具结果缓存有效期(秒)，为0或未提供tool_cache时不缓存
         
     Returns:
-        构建好的图对象
+        构建好的图对象；编译开销较大，调用方应在实例上保存编译结果而不是每次调用重新构建
     """
+    if tool_cache_ttl <= 0:
+        tool_cache = None
+
     # 创建工作流图，指定状态类型
     workflow = graph.StateGraph(state_class)
     
@@ -44,11 +52,19 @@ def build_graph(
         tool_handlers = {}
         for tool in tools:
             def create_handler(tool_func):
-                def handler(state):
+                async def handler(state):
                     # 从状态获取工具参数
                     tool_args = state.get('tool_args', {})
-                    # 调用工具函数
-                    result = tool_func(tool_input=tool_args)
+                    # 开启工具缓存时，相同工具和参数的调用直接复用缓存结果
+                    cache_key = tool_cache.make_key('tool', tool_func.__name__, tool_args) if tool_cache else None
+                    result = await tool_cache.get_cached_data(cache_key) if cache_key else None
+                    if result is None:
+                        # 调用工具函数，同步工具为轻量计算直接调用，协程工具则等待其完成
+                        result = tool_func(tool_input=tool_args)
+                        if inspect.isawaitable(result):
+                            result = await result
+                        if cache_key:
+                            await tool_cache.cache_data(cache_key, result, expire_seconds=tool_cache_ttl)
                     # 将结果添加到消息列表
                     from langchain_core.messages import AIMessage
                     return {
@@ -2,10 +2,12 @@
 运费险智能体模块
 """
 
-import json
+import asyncio
 import logging
+from functools import lru_cache
 from typing import Annotated, Any, Dict, List, Optional, TypedDict
 
+import orjson
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from langgraph.graph.message import add_messages
@@ -17,9 +19,81 @@ from app.services.agents.prompts import (
     SHIPPING_FEE_SYSTEM_PROMPT,
 )
 from app.services.agents.tools import SHIPPING_FEE_TOOLS
+from app.services.redis_service import cache_service
 
 logger = logging.getLogger(__name__)
 
+# args不是字典时依次尝试的参数键
+_FALLBACK_ARG_KEYS = ('arguments', 'args', 'argument', 'arg', 'tool_input')
+
+
+# 已加载的tiktoken编码器，按模型名称保存，加载失败时保存None
+_encodings: Dict[str, Any] = {}
+
+
+def load_encoding(model_name: str):
+    """
+    加载模型对应的tiktoken编码器，首次加载可能需要下载编码文件，是阻塞调用，需在线程中执行
+
+    Returns:
+        编码器实例，tiktoken不可用或编码文件无法加载时返回None
+    """
+    if model_name in _encodings:
+        return _encodings[model_name]
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            # 非OpenAI模型名称，使用通用编码近似计算
+            encoding = tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        logger.warning(f'tiktoken编码器不可用，按字符数估算token: {e}')
+        encoding = None
+    _encodings[model_name] = encoding
+    # 加载前按字符数估算的结果不再使用
+    _count_tokens.cache_clear()
+    return encoding
+
+
+def _get_encoding(model_name: str):
+    """获取已加载的编码器，未加载时返回None，不在事件循环中同步加载编码文件"""
+    return _encodings.get(model_name)
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str, model_name: str) -> int:
+    """计算文本的token数，历史消息每轮都会重复计算，因此缓存结果"""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        # 中文约每个字符一个token，英文约四个字符一个token，按字符数估算偏保守
+        return len(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def trim_messages_by_tokens(messages: List, budget: int, model_name: str) -> List:
+    """
+    从最近的消息开始保留，直到累计token数达到预算
+
+    Args:
+        messages: 对话消息列表
+        budget: token预算
+        model_name: 模型名称，用于选择编码器
+
+    Returns:
+        预算内的最近消息，至少包含最后一条消息
+    """
+    total = 0
+    start = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        content = getattr(messages[i], 'content', '')
+        total += _count_tokens(content if isinstance(content, str) else str(content), model_name)
+        if total > budget and start < len(messages):
+            break
+        start = i
+    return messages[start:]
+
 
 # 定义状态类型
 class ShippingFeeState(TypedDict):
@@ -28,6 +102,7 @@ class ShippingFeeState(TypedDict):
     tool: str  # 当前选择的工具
     tool_args: Dict[str, Any]  # 工具参数
     last_tool: Optional[str]  # 上一次使用的工具
+    human_turns: int  # 用户消息数，随用户消息递增，避免每轮遍历消息历史
     messages: Annotated[List, add_messages]  # 消息历史
 
 
@@ -37,17 +112,38 @@ class ShippingFeeAgent:
     def __init__(self):
         """初始化运费险代理"""
         self.tools = SHIPPING_FEE_TOOLS
+        self._model_name = settings.LLM_MODEL_NAME
         self.llm = self._create_llm()
+        self._token_budget = settings.LLM_CONTEXT_TOKEN_BUDGET
+        # 工具列表在智能体生命周期内不变，只需绑定一次，避免每轮对话重新生成工具schema
+        self.llm_with_tools = self.llm.bind_tools(self.tools)
+        # 生成回复使用的系统提示不随对话变化，只创建一次
+        self._response_system_message = SystemMessage(content=SHIPPING_FEE_RESPONSE_PROMPT)
+        # 系统提示中不随对话变化的部分预先拼接好
+        self._system_prefix = SHIPPING_FEE_SYSTEM_PROMPT + '\n\n当前对话信息:\n'
+        self._system_suffix = (
+            '\n- 可用工具: '
+            + ', '.join(t.__name__ for t in self.tools)
+            + '\n\n请基于上下文决定是调用工具还是直接回复用户。如果决定调用工具，请选择最合适的工具。'
+        )
         self.graph = self._build_graph()
 
+    async def warm_up(self, timeout: float = 30) -> None:
+        """在线程中预加载token计数使用的编码器，超时后加载在后台继续，期间按字符数估算token"""
+        try:
+            await asyncio.wait_for(asyncio.to_thread(load_encoding, self._model_name), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'tiktoken编码器加载超时({timeout}秒)，暂按字符数估算token')
+
     def _create_llm(self) -> ChatOpenAI:
         """创建语言模型实例"""
-        # 从配置中获取API密钥和URL
-        api_key = settings.get_config('LLM_API_KEY', 'Your API Key')
-        base_url = settings.get_config('LLM_API_BASE', 'Your Base URL')
-        model_name = settings.get_config('LLM_MODEL_NAME', 'Your Model Name')
+        # 直接读取配置字段；ChatOpenAI创建时要求提供密钥，未配置时使用占位值，未配置URL时使用默认地址
+        api_key = settings.LLM_API_KEY or 'Your API Key'
+        base_url = settings.LLM_API_BASE or None
 
-        return ChatOpenAI(openai_api_key=api_key, openai_api_base=base_url, model_name=model_name, temperature=0)
+        return ChatOpenAI(
+            openai_api_key=api_key, openai_api_base=base_url, model_name=self._model_name, temperature=0
+        )
 
     def _build_graph(self):
         """构建任务图"""
@@ -56,39 +152,30 @@ class ShippingFeeAgent:
             state_class=ShippingFeeState,
             main_node_name='运费险助手节点',
             tools=self.tools,
+            tool_cache=cache_service,
+            tool_cache_ttl=settings.AGENT_TOOL_CACHE_TTL_SECONDS,
         )
 
-    def _apply_agent_node(self, state: ShippingFeeState) -> Dict[str, Any]:
+    async def _apply_agent_node(self, state: ShippingFeeState) -> Dict[str, Any]:
         """主节点函数：决定使用哪个工具或直接回复"""
         logger.info('运费险助手节点正在思考，准备调用工具')
 
-        # 构建上下文信息
-        context_info = {
-            'conversation_turns': len([m for m in state['messages'] if isinstance(m, HumanMessage)]),
-            'last_tool_used': state.get('last_tool', None),
-            'available_tools': [t.__name__ for t in self.tools],
-        }
-
-        context_prompt = f"""
-当前对话信息:
-- 对话轮数: {context_info['conversation_turns']}
-- 上次使用的工具: {context_info['last_tool_used'] or '无'}
-- 可用工具: {', '.join(context_info['available_tools'])}
-
-请基于上下文决定是调用工具还是直接回复用户。如果决定调用工具，请选择最合适的工具。
-""".strip()
-
-        # 为模型提供增强的系统提示
-        enhanced_system = SHIPPING_FEE_SYSTEM_PROMPT + '\n\n' + context_prompt
+        # 为模型提供增强的系统提示，只有对话轮数和上次使用的工具随每轮变化
+        enhanced_system = (
+            f"{self._system_prefix}- 对话轮数: {state.get('human_turns', 0)}\n"
+            f"- 上次使用的工具: {state.get('last_tool') or '无'}{self._system_suffix}"
+        )
 
-        # 绑定工具并调用模型
-        llm_with_tools = self.llm.bind_tools(self.tools)
-        resp = llm_with_tools.invoke([SystemMessage(content=enhanced_system)] + state['messages'])
+        # 调用绑定了工具的模型
+        history = trim_messages_by_tokens(state['messages'], self._token_budget, self._model_name)
+        resp = await self._ainvoke_cached(
+            self.llm_with_tools, 'agent', [SystemMessage(content=enhanced_system)] + history
+        )
 
         if resp.tool_calls and len(resp.tool_calls) > 0:
             tool_call = resp.tool_calls[0]
             # 输出工具调用结构以便调试
-            logger.info(f'工具调用结构: {json.dumps(tool_call)}')
+            logger.info(f'工具调用结构: {orjson.dumps(tool_call).decode()}')
 
             # 获取函数名称
             function_name = tool_call['name']
@@ -107,7 +194,7 @@ class ShippingFeeAgent:
         else:
             # 模型决定直接回复
             logger.info('模型决定直接回复而不是调用工具')
-            reply = self.generate_natural_response(state['messages'])
+            reply = await self.generate_natural_response(state['messages'])
             return {
                 'messages': state['messages'] + [reply],
                 'tool': '',
@@ -117,47 +204,69 @@ class ShippingFeeAgent:
 
     def _extract_tool_arguments(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """从工具调用中提取参数"""
-        arguments = {}
-        possible_arg_keys = ['arguments', 'args', 'argument', 'arg', 'tool_input']
-
-        for key in possible_arg_keys:
-            if key in tool_call:
-                arg_value = tool_call[key]
-                if isinstance(arg_value, dict):
-                    arguments = arg_value
-                    break
-                elif isinstance(arg_value, str):
-                    try:
-                        parsed_args = json.loads(arg_value)
-                        if isinstance(parsed_args, dict):
-                            arguments = parsed_args
-                            break
-                    except json.JSONDecodeError:
-                        pass
-
-        # 如果参数在args.tool_input中
-        if 'args' in tool_call and isinstance(tool_call['args'], dict):
-            if 'tool_input' in tool_call['args']:
-                tool_input = tool_call['args']['tool_input']
-                if isinstance(tool_input, dict):
-                    arguments = tool_input
-
-        return arguments
-
-    def generate_natural_response(self, messages: List) -> AIMessage:
+        # LangChain的标准格式：参数为args字典，部分模型会再包一层tool_input
+        args = tool_call.get('args')
+        if isinstance(args, dict):
+            tool_input = args.get('tool_input')
+            return tool_input if isinstance(tool_input, dict) else args
+
+        # 兼容其他格式：参数可能在其他键中，或是JSON字符串
+        for key in _FALLBACK_ARG_KEYS:
+            arg_value = tool_call.get(key)
+            if isinstance(arg_value, dict):
+                return arg_value
+            if isinstance(arg_value, str):
+                try:
+                    parsed_args = orjson.loads(arg_value)
+                except orjson.JSONDecodeError:
+                    continue
+                if isinstance(parsed_args, dict):
+                    return parsed_args
+
+        return {}
+
+    async def generate_natural_response(self, messages: List) -> AIMessage:
         """生成自然语言回复"""
-        # 构建请求上下文
-        context_messages = [SystemMessage(content=SHIPPING_FEE_RESPONSE_PROMPT)]
-
-        # 添加用户对话历史，最多保留最近10条消息
-        recent_messages = messages[-10:] if len(messages) > 10 else messages
-        context_messages.extend(recent_messages)
+        # 构建请求上下文：固定的系统提示加上按token预算保留的最近对话历史
+        context_messages = [
+            self._response_system_message,
+            *trim_messages_by_tokens(messages, self._token_budget, self._model_name),
+        ]
 
         # 生成回复
-        response = self.llm.invoke(context_messages)
+        response = await self._ainvoke_cached(self.llm, 'response', context_messages)
+        return response
+
+    async def _ainvoke_cached(self, llm: Any, namespace: str, messages: List) -> AIMessage:
+        """
+        调用模型，开启回复缓存时相同的提示和对话历史直接复用缓存的回复
+
+        Args:
+            llm: 模型实例
+            namespace: 缓存命名空间，区分不同用途的模型调用
+            messages: 发送给模型的消息列表
+
+        Returns:
+            模型回复
+        """
+        ttl = settings.AGENT_RESPONSE_CACHE_TTL_SECONDS
+        if ttl <= 0:
+            return await llm.ainvoke(messages)
+
+        key = cache_service.make_key(namespace, self._model_name, [(m.type, m.content) for m in messages])
+        cached = await cache_service.get_cached_data(key)
+        if cached:
+            return AIMessage(content=cached['content'], tool_calls=cached['tool_calls'])
+
+        response = await llm.ainvoke(messages)
+        await cache_service.cache_data(
+            key, {'content': response.content, 'tool_calls': response.tool_calls}, expire_seconds=ttl
+        )
         return response
 
-    def process_message(self, message: str, session_id: str = None, state: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def process_message(
+        self, message: str, session_id: str = None, state: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
         """
         处理用户消息，返回回复和更新后的状态
 
@@ -171,21 +280,30 @@ class ShippingFeeAgent:
         """
         # 如果没有提供状态，创建新状态
         if state is None:
-            state = {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None}
+            state = {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None, 'human_turns': 0}
 
         # 添加用户消息到状态
         user_message = HumanMessage(content=message)
         state['messages'].append(user_message)
+        turns = state.get('human_turns')
+        if turns is None:
+            # 兼容未记录轮数的旧会话状态，只在首次加载时统计一次
+            turns = sum(
+                1
+                for m in state['messages'][:-1]
+                if isinstance(m, HumanMessage) or (isinstance(m, dict) and m.get('type') == 'human')
+            )
+        state['human_turns'] = turns + 1
 
         # 调用图执行流程
-        result = self.graph.invoke(state)
+        result = await self.graph.ainvoke(state)
 
         # 查找最后一条AI消息
         last_ai_message = next((msg for msg in reversed(result['messages']) if isinstance(msg, AIMessage)), None)
 
         # 如果图执行后没有AI消息，生成新回复
         if not last_ai_message or last_ai_message in state['messages']:
-            response = self.generate_natural_response(result['messages'])
+            response = await self.generate_natural_response(result['messages'])
             result['messages'].append(response)
             last_ai_message = response
 
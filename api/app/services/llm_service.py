@@ -2,42 +2,80 @@
 LLM服务模块 - 负责与大模型API交互
 """
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from app.core.config import settings
 
 import httpx
+import orjson
 
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 未配置API密钥时返回给用户的提示
+NOT_CONFIGURED_REPLY = '抱歉，服务未正确配置，无法回答您的问题。请联系管理员。'
 
-async def get_llm_response(
+
+class LLMStreamError(Exception):
+    """流式调用大模型失败，异常信息为可直接展示给用户的错误提示"""
+
+
+# 进程内共享的HTTP客户端，复用到LLM服务的连接，避免每次请求重新建立TCP/TLS连接
+_client: Optional[httpx.AsyncClient] = None
+
+# 正在进行中的非流式请求，键为请求URL和请求体
+_inflight_requests: Dict[bytes, 'asyncio.Future[str]'] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端，首次使用或关闭后重新创建"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,  # 并发请求在同一连接上多路复用
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """关闭共享的HTTP客户端，在应用关闭时调用"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _build_request(
     question: str,
     model_params: Optional[Dict[str, Any]] = None,
     conversation_history: Optional[List[Dict[str, str]]] = None,
-) -> str:
+) -> Optional[Tuple[str, Dict[str, str], Dict[str, Any]]]:
     """
-    调用OpenAI API获取大模型回答
+    构造调用OpenAI兼容接口的请求
 
     Args:
         question: 用户提问
-        model_params: 模型参数，可包含api_key, base_url, model_name等
-        conversation_history: 对话历史消息列表，格式为[{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+        model_params: 模型参数，可包含temperature, max_tokens等
+        conversation_history: 对话历史消息列表
 
     Returns:
-        模型的回答文本
+        (请求URL, 请求头, 请求体)，未配置API密钥时返回None
     """
-    # 合并配置和请求参数
-    api_key = settings.get_config('LLM_API_KEY', 'Your API Key')
-    base_url = settings.get_config('LLM_API_BASE', 'Your Base URL')
-    model_name = settings.get_config('LLM_MODEL_NAME', 'Your Model Name')
+    model_params = model_params or {}
+
+    # 合并配置和请求参数，直接读取Settings字段
+    api_key = settings.LLM_API_KEY
+    base_url = settings.LLM_API_BASE or ''
+    model_name = settings.LLM_MODEL_NAME
     temperature = model_params.get('temperature', 0.7)
     max_tokens = model_params.get('max_tokens', 1024)
 
     if not api_key:
         logger.error('未提供API密钥')
-        return '抱歉，服务未正确配置，无法回答您的问题。请联系管理员。'
+        return None
 
     # 构造请求URL
     url = f"{base_url.rstrip('/')}/chat/completions"
@@ -63,27 +101,67 @@ async def get_llm_response(
         'max_tokens': max_tokens,
     }
 
-    try:
-        # 记录请求信息
-        logger.info(f'发送请求到LLM API: {url}, 模型: {model_name}, 消息数: {len(messages)}')
+    # 记录请求信息
+    logger.info(f'发送请求到LLM API: {url}, 模型: {model_name}, 消息数: {len(messages)}')
+    return url, headers, payload
+
+
+async def get_llm_response(
+    question: str,
+    model_params: Optional[Dict[str, Any]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    """
+    调用OpenAI API获取大模型回答
+
+    Args:
+        question: 用户提问
+        model_params: 模型参数，可包含api_key, base_url, model_name等
+        conversation_history: 对话历史消息列表，格式为[{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+
+    Returns:
+        模型的回答文本
+    """
+    request = _build_request(question, model_params, conversation_history)
+    if request is None:
+        return NOT_CONFIGURED_REPLY
+    url, headers, payload = request
+
+    # 相同的请求正在进行时直接等待其结果，并发的重复提交只向上游发送一次
+    key = url.encode() + orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    task = _inflight_requests.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_request_completion(url, headers, payload))
+        _inflight_requests[key] = task
+        task.add_done_callback(lambda _: _inflight_requests.pop(key, None))
+    # shield避免单个调用方取消时连带取消其他调用方共享的请求
+    return await asyncio.shield(task)
+
+
+async def _request_completion(url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> str:
+    """
+    发送非流式的对话补全请求
 
+    Returns:
+        模型的回答文本，出错时返回错误提示
+    """
+    try:
         # 发送请求
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await _get_client().post(url, json=payload, headers=headers)
 
-            # 检查响应状态
-            response.raise_for_status()
+        # 检查响应状态
+        response.raise_for_status()
 
-            # 解析响应
-            result = response.json()
+        # 解析响应
+        result = response.json()
 
-            # 提取回答
-            if 'choices' in result and len(result['choices']) > 0:
-                answer = result['choices'][0]['message']['content'].strip()
-                return answer
-            else:
-                logger.error(f'无效的API响应: {result}')
-                return '抱歉，无法获取有效回答，请稍后再试。'
+        # 提取回答
+        if 'choices' in result and len(result['choices']) > 0:
+            answer = result['choices'][0]['message']['content'].strip()
+            return answer
+        else:
+            logger.error(f'无效的API响应: {result}')
+            return '抱歉，无法获取有效回答，请稍后再试。'
 
     except httpx.HTTPStatusError as e:
         logger.error(f'HTTP错误: {e.response.status_code} - {e.response.text}')
@@ -96,3 +174,62 @@ async def get_llm_response(
     except Exception as e:
         logger.error(f'获取LLM回答时出错: {e}')
         return '抱歉，处理您的问题时出现错误，请稍后再试。'
+
+
+async def get_llm_response_stream(
+    question: str,
+    model_params: Optional[Dict[str, Any]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+) -> AsyncIterator[str]:
+    """
+    以流式方式调用OpenAI API，逐段返回大模型回答
+
+    Args:
+        question: 用户提问
+        model_params: 模型参数，可包含temperature, max_tokens等
+        conversation_history: 对话历史消息列表
+
+    Yields:
+        回答文本片段
+
+    Raises:
+        LLMStreamError: 未配置API密钥或调用上游失败，可能在已返回部分片段后抛出
+    """
+    request = _build_request(question, model_params, conversation_history)
+    if request is None:
+        raise LLMStreamError(NOT_CONFIGURED_REPLY)
+    url, headers, payload = request
+    payload['stream'] = True
+
+    try:
+        async with _get_client().stream('POST', url, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+
+            # 解析SSE数据行：data: {...}，以data: [DONE]结束
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                chunk = orjson.loads(data)
+                choices = chunk.get('choices') or []
+                if not choices:
+                    continue
+                delta = (choices[0].get('delta') or {}).get('content')
+                if delta:
+                    yield delta
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f'HTTP错误: {e.response.status_code} - {e.response.text}')
+        raise LLMStreamError(f'抱歉，请求出错 (HTTP {e.response.status_code})，请稍后再试。') from e
+
+    except httpx.RequestError as e:
+        logger.error(f'请求错误: {e}')
+        raise LLMStreamError('抱歉，连接服务时出现问题，请稍后再试。') from e
+
+    except Exception as e:
+        logger.error(f'获取LLM回答时出错: {e}')
+        raise LLMStreamError('抱歉，处理您的问题时出现错误，请稍后再试。') from e
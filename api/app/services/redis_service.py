@@ -1,7 +1,9 @@
-import json
 import logging
 from typing import Any, Dict, List, Optional, TypeVar, Union, Generic
 
+import orjson
+import xxhash
+
 from app.db.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
@@ -35,8 +37,8 @@ class RedisService(Generic[T]):
         data = await redis_client.get(self._get_key(key))
         if data:
             try:
-                return json.loads(data)
-            except json.JSONDecodeError as e:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Redis JSON decode error: {e}")
         return None
     
@@ -45,9 +47,9 @@ class RedisService(Generic[T]):
         设置 JSON 数据
         """
         try:
-            json_data = json.dumps(value)
+            json_data = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
             return await redis_client.set(self._get_key(key), json_data, expire=expire)
-        except (TypeError, json.JSONEncoder) as e:
+        except orjson.JSONEncodeError as e:
             logger.error(f"Redis JSON encode error: {e}")
             return False
     
@@ -67,7 +69,9 @@ class RedisService(Generic[T]):
         """
         存储对象
         """
-        if hasattr(obj, "dict"):  # Pydantic 模型支持
+        if hasattr(obj, "model_dump"):  # Pydantic v2 模型
+            return await self.set_json(key, obj.model_dump(), expire=expire)
+        elif hasattr(obj, "dict"):  # Pydantic v1 模型
             return await self.set_json(key, obj.dict(), expire=expire)
         elif hasattr(obj, "__dict__"):  # 普通对象
             return await self.set_json(key, obj.__dict__, expire=expire)
@@ -81,6 +85,18 @@ class CacheService(RedisService):
     def __init__(self):
         super().__init__("cache")
     
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        """
+        根据任意可JSON序列化的参数生成定长的缓存键
+
+        Args:
+            namespace: 键的命名空间
+            parts: 参与计算的参数，字典按键排序后参与计算
+        """
+        digest = xxhash.xxh3_64_hexdigest(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        return f"{namespace}:{digest}"
+
     async def get_cached_data(self, key: str) -> Optional[Any]:
         """
         获取缓存数据
@@ -1,40 +1,102 @@
 """
 会话管理服务
 """
-import json
+import asyncio
 import logging
+import time
 import uuid
+import weakref
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 from app.core.config import settings
 from app.db.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
-class SessionEncoder(json.JSONEncoder):
-    """用于序列化会话数据的JSON编码器"""
-    def default(self, obj):
-        # 处理常见的LangChain消息类型
-        if hasattr(obj, "content") and hasattr(obj, "type"):
-            # 处理LangChain消息对象(如HumanMessage, AIMessage等)
-            return {
-                "content": obj.content,
-                "type": obj.type,
-                "_type": obj.__class__.__name__
-            }
-        # 其他类型的处理
-        if hasattr(obj, "__dict__"):
-            return obj.__dict__
-        return super().default(obj)
+# 追加消息的Lua脚本，会话存在时在Redis端原子完成字段更新、消息追加、有效期刷新和会话索引刷新，一次往返
+# KEYS: 会话元数据哈希键、消息列表键，之后为需要刷新的会话索引键(全部会话索引，以及可选的用户会话索引)
+# ARGV: 有效期、当前时间戳、会话ID、字段数n、n组字段名/字段值、待追加的消息
+APPEND_MESSAGES_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local field_count = tonumber(ARGV[4])
+if field_count > 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 5, 4 + field_count * 2))
+end
+local first_message = 5 + field_count * 2
+if first_message <= #ARGV then
+    redis.call('RPUSH', KEYS[2], unpack(ARGV, first_message, #ARGV))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+for i = 3, #KEYS do
+    redis.call('ZADD', KEYS[i], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+return 1
+"""
+
+# 重建对话历史时保留的消息角色
+_HISTORY_ROLES = ("user", "assistant")
+
+
+def _encode_lc_message(obj: Any) -> Any:
+    """orjson的default回调，序列化会话数据中的非JSON原生对象"""
+    # 处理常见的LangChain消息类型
+    if hasattr(obj, "content") and hasattr(obj, "type"):
+        # 处理LangChain消息对象(如HumanMessage, AIMessage等)
+        return {
+            "content": obj.content,
+            "type": obj.type,
+            "_type": type(obj).__name__
+        }
+    # 其他类型的处理
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 
 class SessionService:
-    """会话管理服务"""
+    """
+    会话管理服务
+
+    每个会话由两个键组成：元数据哈希(id、created_at、user_id、state等字段，字段值为JSON)
+    和消息列表(每条消息一个JSON元素)。追加消息只写入新消息，不再重写整个会话。
+    state中的对话历史不随state保存，读取时由消息列表重建，每轮写入的数据量不随对话长度增长。
+    """
     
     def __init__(self):
         """初始化会话服务"""
         self.session_prefix = "nativeai:session:"
-        self.session_ttl = int(settings.get_config("SESSION_TTL_SECONDS", 3600 * 24))  # 默认24小时
+        # 会话索引(有序集合，分数为最后活跃时间)，全部会话一个索引、每个用户一个索引，用于分页列出会话；
+        # 分数早于一个有效期的成员对应的会话必然已过期，创建和列出会话时按分数清理，索引键随写入刷新有效期
+        self.index_prefix = "nativeai:sessions:"
+        self.session_ttl = settings.SESSION_TTL_SECONDS  # 默认24小时
+        # 会话有效期刷新间隔(秒)，间隔内的重复读取不再发送EXPIRE
+        self.ttl_refresh_interval = 60
+        self._ttl_refreshed_at: "OrderedDict[str, float]" = OrderedDict()
+        self._ttl_refreshed_maxsize = 10000
+        # 进程内会话缓存，保存序列化后的元数据字段和消息，缓存期内的读取不再访问存储；
+        # 每次读取重新解码，调用方拿到的是独立的对象，修改不会影响缓存
+        # 多个工作进程时，各进程的缓存可能读到其他进程写入前的状态，写回时会覆盖其他进程保存的对话状态，因此关闭缓存
+        self.cache_ttl = settings.SESSION_CACHE_TTL_SECONDS if settings.EFFECTIVE_WORKERS == 1 else 0
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any], List[Any]]]" = OrderedDict()
+        self._cache_maxsize = 10000
+        # 每个会话一把锁，串行化同一进程内对同一会话的读改写；锁不再被持有时自动回收
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _meta_key(self, session_id: str) -> str:
+        """获取会话元数据哈希键"""
+        return f"{self.session_prefix}{session_id}:meta"
+
+    def _msgs_key(self, session_id: str) -> str:
+        """获取会话消息列表键"""
+        return f"{self.session_prefix}{session_id}:messages"
     
     async def create_session(self, user_id: str = None) -> str:
         """
@@ -51,17 +113,105 @@ class SessionService:
             "id": session_id,
             "created_at": datetime.now().isoformat(),
             "user_id": user_id,
-            "messages": [],
-            "state": {"messages": [], "tool": "", "tool_args": {}, "last_tool": None}
+            "state": {"tool": "", "tool_args": {}, "last_tool": None, "human_turns": 0}
         }
         
-        # 存储会话数据
-        key = f"{self.session_prefix}{session_id}"
-        await redis_client.set(key, json.dumps(session_data, ensure_ascii=False), expire=self.session_ttl)
+        # 会话元数据、有效期和会话索引(全部会话 + 用户会话)在一次往返中写入
+        meta_key = self._meta_key(session_id)
+        encoded_fields = self._encode_fields(session_data)
+        now_ts = time.time()
+        async with redis_client.pipeline() as pipe:
+            pipe.hset(meta_key, mapping=encoded_fields)
+            pipe.expire(meta_key, self.session_ttl)
+            for index_key in self._index_keys(user_id):
+                pipe.zremrangebyscore(index_key, "-inf", now_ts - self.session_ttl)
+                pipe.zadd(index_key, {session_id: now_ts})
+                pipe.expire(index_key, self.session_ttl)
+            results = await pipe.execute()
+
+        if results:
+            # 消息列表在首次追加消息时创建
+            self._mark_ttl_refreshed(session_id)
+            self._cache_put(session_id, encoded_fields, [])
         logger.info(f"Created new session: {session_id}")
         
         return session_id
     
+    def _index_key(self, user_id: Optional[str] = None) -> str:
+        """获取会话索引键，不指定用户时为全部会话索引"""
+        return f"{self.index_prefix}user:{user_id}" if user_id else f"{self.index_prefix}all"
+
+    def _index_keys(self, user_id: Optional[str] = None) -> List[str]:
+        """获取会话所在的全部索引键：全部会话索引，会话有所属用户时再加上用户会话索引"""
+        return [self._index_key(), self._index_key(user_id)] if user_id else [self._index_key()]
+
+    async def list_user_sessions(
+        self, user_id: Optional[str] = None, limit: int = 10, skip: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        分页获取会话列表，按最后活跃时间倒序
+
+        先清理索引中已超过有效期的会话，再读取一页会话ID和总数，最后用一个管道取回这些会话的摘要字段和消息数
+
+        Args:
+            user_id: 用户ID，不提供则列出所有会话
+            limit: 每页数量
+            skip: 跳过数量
+
+        Returns:
+            (会话摘要列表, 会话总数)
+        """
+        index_key = self._index_key(user_id)
+        async with redis_client.pipeline() as pipe:
+            pipe.zremrangebyscore(index_key, "-inf", time.time() - self.session_ttl)
+            pipe.zrevrange(index_key, skip, skip + limit - 1)
+            pipe.zcard(index_key)
+            results = await pipe.execute()
+
+        if not results:
+            return [], 0
+        _, session_ids, total = results
+        if not session_ids:
+            return [], total
+
+        summary_fields = ["created_at", "updated_at", "user_id"]
+        async with redis_client.pipeline() as pipe:
+            for session_id in session_ids:
+                pipe.hmget(self._meta_key(session_id), summary_fields)
+                pipe.llen(self._msgs_key(session_id))
+            results = await pipe.execute()
+        if not results:
+            return [], total
+
+        sessions = []
+        stale_ids = []
+        for i, session_id in enumerate(session_ids):
+            values, message_count = results[2 * i], results[2 * i + 1]
+            if values[0] is None:
+                # 会话已过期或被删除，从索引中移除
+                stale_ids.append(session_id)
+                continue
+            try:
+                created_at, updated_at, session_user_id = (
+                    orjson.loads(value) if value is not None else None for value in values
+                )
+            except orjson.JSONDecodeError as e:
+                logger.error(f"Failed to decode session data: {e}")
+                continue
+            sessions.append({
+                "id": session_id,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "user_id": session_user_id,
+                "message_count": message_count,
+            })
+
+        if stale_ids:
+            await redis_client.zrem(index_key, *stale_ids)
+            total -= len(stale_ids)
+
+        return sessions, total
+
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
         获取会话数据
@@ -70,38 +220,118 @@ class SessionService:
             session_id: 会话ID
             
         Returns:
-            会话数据字典，不存在则返回None
+            会话数据字典，不存在则返回None；每次调用返回新解码的字典，修改后需通过本服务写回
         """
-        key = f"{self.session_prefix}{session_id}"
-        data = await redis_client.get(key)
+        cached = self._cache_get(session_id)
+        if cached is not None:
+            session_data = self._decode_session(*cached)
+            if session_data is not None:
+                await self._refresh_ttl(session_id, session_data.get("user_id"))
+            return session_data
         
-        if not data:
+        # 元数据和消息列表在一次往返中读取
+        async with redis_client.pipeline() as pipe:
+            pipe.hgetall(self._meta_key(session_id))
+            pipe.lrange(self._msgs_key(session_id), 0, -1)
+            results = await pipe.execute()
+
+        if not results or not results[0]:
             logger.warning(f"Session not found: {session_id}")
             return None
+        meta, messages = results
         
-        try:
-            session_data = json.loads(data)
+        session_data = self._decode_session(meta, messages)
+        if session_data is not None:
             # 刷新会话有效期
-            await redis_client.set(key, data, expire=self.session_ttl)
-            
-            # 适应性处理可能的序列化对象
-            # 这里我们不需要将字典转回LangChain对象，因为客户端代码只需要访问内容
-            # 但我们需要确保session_data的格式与客户端期望的一致
-            if "state" in session_data and "messages" in session_data["state"]:
-                # 检查messages列表中的对象是否为序列化后的LangChain消息
-                for i, msg in enumerate(session_data["state"]["messages"]):
-                    if isinstance(msg, dict) and "_type" in msg:
-                        # 我们保留这些消息的字典形式，确保它们的结构符合代码需求
-                        pass
+            await self._refresh_ttl(session_id, session_data.get("user_id"))
+            self._cache_put(session_id, meta, messages)
+        return session_data
+
+    def _decode_session(self, meta: Dict[str, Any], messages: List[Any]) -> Optional[Dict[str, Any]]:
+        """
+        将元数据哈希字段和消息列表解码为会话字典
+
+        Args:
+            meta: 元数据哈希，字段值为JSON
+            messages: 消息列表，每个元素为JSON
             
-            return session_data
-        except json.JSONDecodeError as e:
+        Returns:
+            会话数据字典，解码失败返回None
+        """
+        try:
+            session_data = {field: orjson.loads(value) for field, value in meta.items()}
+            session_data["messages"] = [orjson.loads(message) for message in messages]
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to decode session data: {e}")
             return None
+        state = session_data.get("state")
+        if isinstance(state, dict) and "messages" not in state:
+            # 由消息列表重建对话历史；早期会话的state自带messages，保持原样
+            state["messages"] = [
+                {"role": message["role"], "content": message["content"]}
+                for message in session_data["messages"]
+                if message.get("role") in _HISTORY_ROLES
+            ]
+        return session_data
+
+    def _cache_get(self, session_id: str) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """读取进程内会话缓存，过期则丢弃；返回序列化后的(元数据字段, 消息列表)"""
+        entry = self._cache.get(session_id)
+        if entry is None:
+            return None
+        cached_at, meta, messages = entry
+        if time.monotonic() - cached_at > self.cache_ttl:
+            del self._cache[session_id]
+            return None
+        self._cache.move_to_end(session_id)
+        return meta, messages
+
+    def _cache_put(self, session_id: str, meta: Dict[str, Any], messages: List[Any]) -> None:
+        """写入进程内会话缓存，超出容量时淘汰最久未使用的会话"""
+        if self.cache_ttl <= 0:
+            return
+        self._cache[session_id] = (time.monotonic(), dict(meta), list(messages))
+        self._cache.move_to_end(session_id)
+        if len(self._cache) > self._cache_maxsize:
+            self._cache.popitem(last=False)
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        """获取会话对应的锁"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    async def _refresh_ttl(self, session_id: str, user_id: Optional[str] = None) -> None:
+        """刷新会话有效期及其在会话索引中的活跃时间，同一会话在刷新间隔内只发送一次"""
+        last_refreshed = self._ttl_refreshed_at.get(session_id)
+        if last_refreshed is not None and time.monotonic() - last_refreshed < self.ttl_refresh_interval:
+            return
+        self._mark_ttl_refreshed(session_id)
+        async with redis_client.pipeline() as pipe:
+            pipe.expire(self._meta_key(session_id), self.session_ttl)
+            pipe.expire(self._msgs_key(session_id), self.session_ttl)
+            self._touch_index(pipe, session_id, user_id)
+            await pipe.execute()
+
+    def _touch_index(self, pipe: Any, session_id: str, user_id: Optional[str]) -> None:
+        """在管道中将会话在所属索引中的分数更新为当前时间，并刷新索引有效期"""
+        now_ts = time.time()
+        for index_key in self._index_keys(user_id):
+            pipe.zadd(index_key, {session_id: now_ts})
+            pipe.expire(index_key, self.session_ttl)
+
+    def _mark_ttl_refreshed(self, session_id: str) -> None:
+        """记录会话有效期的刷新时间"""
+        self._ttl_refreshed_at[session_id] = time.monotonic()
+        self._ttl_refreshed_at.move_to_end(session_id)
+        if len(self._ttl_refreshed_at) > self._ttl_refreshed_maxsize:
+            self._ttl_refreshed_at.popitem(last=False)
     
     async def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
         """
-        更新会话数据
+        更新会话数据，只写入变更的字段
         
         Args:
             session_id: 会话ID
@@ -110,55 +340,33 @@ class SessionService:
         Returns:
             是否更新成功
         """
-        key = f"{self.session_prefix}{session_id}"
-        session_data = await self.get_session(session_id)
-        
-        if not session_data:
-            return False
-        
-        # 更新会话数据
-        data = self._convert_non_serializable(data)  # 确保数据可序列化
-        session_data.update(data)
-        session_data["updated_at"] = datetime.now().isoformat()
-        
-        # 存储更新后的会话数据
-        try:
-            # 使用自定义JSON编码器进行序列化
-            json_data = json.dumps(session_data, cls=SessionEncoder, ensure_ascii=False)
-            success = await redis_client.set(key, json_data, expire=self.session_ttl)
-            return success
-        except TypeError as e:
-            logger.error(f"JSON序列化错误: {e}")
-            # 尝试更强的序列化处理
-            safe_data = self._convert_non_serializable(session_data)
-            json_data = json.dumps(safe_data, ensure_ascii=False)
-            success = await redis_client.set(key, json_data, expire=self.session_ttl)
-            return success
+        # 与追加消息共用同一Lua脚本，在服务端一次往返完成存在性检查、字段写入和有效期刷新
+        return await self.add_messages_bulk(session_id, [], data=data)
     
-    def _convert_non_serializable(self, data: Any) -> Any:
+    def _serialize(self, data: Any) -> bytes:
         """
-        递归地将不可序列化的对象转换为可序列化的字典
+        将会话数据序列化为JSON
         
         Args:
-            data: 需要转换的数据
+            data: 会话数据
             
         Returns:
-            转换后的可序列化数据
-        """
-        if hasattr(data, "content") and hasattr(data, "type"):
-            # 处理LangChain消息对象
-            return {
-                "content": data.content,
-                "type": data.type,
-                "_type": data.__class__.__name__
-            }
-        elif isinstance(data, dict):
-            return {k: self._convert_non_serializable(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._convert_non_serializable(item) for item in data]
-        return data
-    
-    async def add_message(self, session_id: str, message: Dict[str, Any], state: Dict[str, Any] = None) -> bool:
+            UTF-8编码的JSON字节串，可直接写入Redis
+        """
+        # LangChain消息等对象由default回调在序列化过程中一并转换
+        return orjson.dumps(data, default=_encode_lc_message, option=orjson.OPT_NON_STR_KEYS)
+
+    def _encode_fields(self, fields: Dict[str, Any]) -> Dict[str, bytes]:
+        """将会话字段逐个序列化为元数据哈希的字段值"""
+        return {field: self._serialize(value) for field, value in fields.items()}
+
+    async def add_message(
+        self,
+        session_id: str,
+        message: Dict[str, Any],
+        state: Dict[str, Any] = None,
+        user_id: Optional[str] = None,
+    ) -> bool:
         """
         添加消息到会话历史
         
@@ -166,44 +374,117 @@ class SessionService:
             session_id: 会话ID
             message: 消息数据
             state: 可选的状态更新数据
+            user_id: 会话所属用户ID，同add_messages_bulk
             
         Returns:
             是否添加成功
         """
-        session_data = await self.get_session(session_id)
-        
-        if not session_data:
-            return False
-        
-        # 确保存在messages字段
-        if "messages" not in session_data:
-            session_data["messages"] = []
+        return await self.add_messages_bulk(session_id, [message], state, user_id=user_id)
+
+    async def add_messages_bulk(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        state: Dict[str, Any] = None,
+        data: Dict[str, Any] = None,
+        now: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+    ) -> bool:
+        """
+        批量添加消息到会话历史，只追加新消息并写入变更的字段
         
-        # 添加消息
-        message["timestamp"] = datetime.now().isoformat()
-        session_data["messages"].append(message)
+        Args:
+            session_id: 会话ID
+            messages: 按顺序追加的消息列表
+            state: 可选的状态更新数据
+            data: 可选的会话字段更新，等同于update_session
+            now: 可选的写入时间，调用方传入自己的请求时间，使消息时间戳、更新时间与响应时间一致
+            user_id: 会话所属用户ID(取自会话数据)，提供时同时刷新该用户的会话索引；全部会话索引总是刷新
+
+        Returns:
+            是否添加成功
+        """
+        # 同一批消息共用一个时间戳
+        now_iso = (now or datetime.now()).isoformat()
+        for message in messages:
+            message["timestamp"] = now_iso
         
-        # 更新状态
+        fields = {}
         if state:
-            # 转换状态中不可序列化的对象
-            state = self._convert_non_serializable(state)
-            session_data["state"] = state
+            # 对话历史已在消息列表中，state只保存其余字段
+            fields["state"] = {key: value for key, value in state.items() if key != "messages"}
+        if data is not None:
+            fields.update(data)
+            fields["updated_at"] = now_iso
+        encoded_fields = self._encode_fields(fields)
+        encoded_messages = [self._serialize(message) for message in messages]
         
-        # 存储更新后的会话数据
-        key = f"{self.session_prefix}{session_id}"
-        try:
-            # 使用自定义JSON编码器进行序列化
-            json_data = json.dumps(session_data, cls=SessionEncoder, ensure_ascii=False)
-            success = await redis_client.set(key, json_data, expire=self.session_ttl)
-            return success
-        except TypeError as e:
-            logger.error(f"JSON序列化错误: {e}")
-            # 尝试更强的序列化处理
-            safe_data = self._convert_non_serializable(session_data)
-            json_data = json.dumps(safe_data, ensure_ascii=False)
-            success = await redis_client.set(key, json_data, expire=self.session_ttl)
+        async with self._lock(session_id):
+            # 存储支持Lua脚本时在服务端原子完成存在性检查和追加
+            if hasattr(redis_client, "eval_script"):
+                success = await self._append_messages_atomic(session_id, encoded_messages, encoded_fields, user_id)
+            else:
+                session_data = await self.get_session(session_id)
+                success = bool(session_data)
+                if success:
+                    meta_key = self._meta_key(session_id)
+                    msgs_key = self._msgs_key(session_id)
+                    async with redis_client.pipeline() as pipe:
+                        if encoded_fields:
+                            pipe.hset(meta_key, mapping=encoded_fields)
+                        if encoded_messages:
+                            pipe.rpush(msgs_key, *encoded_messages)
+                        pipe.expire(meta_key, self.session_ttl)
+                        pipe.expire(msgs_key, self.session_ttl)
+                        self._touch_index(pipe, session_id, session_data.get("user_id"))
+                        success = bool(await pipe.execute())
+
+            # 成功后原地更新缓存，保留原缓存时间，使缓存仍按期失效并重新读取其他进程的写入
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                if success:
+                    cached[1].update(encoded_fields)
+                    cached[2].extend(encoded_messages)
+                else:
+                    del self._cache[session_id]
+            if success:
+                self._mark_ttl_refreshed(session_id)
             return success
     
+    async def _append_messages_atomic(
+        self,
+        session_id: str,
+        encoded_messages: List[bytes],
+        encoded_fields: Dict[str, bytes],
+        user_id: Optional[str] = None,
+    ) -> bool:
+        """
+        通过Lua脚本一次往返完成会话存在性检查、字段更新、消息追加、有效期和会话索引刷新
+
+        Args:
+            session_id: 会话ID
+            encoded_messages: 已序列化的消息列表
+            encoded_fields: 已序列化的元数据字段
+            user_id: 会话所属用户ID，提供时同时刷新用户会话索引
+
+        Returns:
+            是否添加成功
+        """
+        args = [self.session_ttl, time.time(), session_id, len(encoded_fields)]
+        for field, value in encoded_fields.items():
+            args.extend((field, value))
+        args.extend(encoded_messages)
+
+        result = await redis_client.eval_script(
+            APPEND_MESSAGES_SCRIPT,
+            keys=[self._meta_key(session_id), self._msgs_key(session_id), *self._index_keys(user_id)],
+            args=args,
+        )
+        if not result:
+            logger.warning(f"Session not found or not updated: {session_id}")
+            return False
+        return True
+
     async def delete_session(self, session_id: str) -> bool:
         """
         删除会话
@@ -214,9 +495,23 @@ class SessionService:
         Returns:
             是否删除成功
         """
-        key = f"{self.session_prefix}{session_id}"
-        success = await redis_client.delete(key)
-        return success
+        self._ttl_refreshed_at.pop(session_id, None)
+        self._cache.pop(session_id, None)
+        meta_key = self._meta_key(session_id)
+        # 先取出所属用户，与删除会话键一起从全部会话索引和用户会话索引中移除
+        user_id, = await redis_client.hmget(meta_key, ["user_id"])
+        if user_id is not None:
+            try:
+                user_id = orjson.loads(user_id)
+            except orjson.JSONDecodeError:
+                user_id = None
+        async with redis_client.pipeline() as pipe:
+            pipe.delete(meta_key)
+            pipe.delete(self._msgs_key(session_id))
+            for index_key in self._index_keys(user_id):
+                pipe.zrem(index_key, session_id)
+            results = await pipe.execute()
+        return bool(results)
 
 
 # 创建全局会话服务实例
@@ -3,25 +3,59 @@ import os
 from typing import AsyncGenerator, Generator
 
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.core.config import settings
 from app.db.base import Base, get_db
 from app.main import app
 
+# 与服务运行时一致使用uvloop事件循环；uvloop不支持Windows，未安装时使用默认事件循环
+try:
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 # 测试数据库URL - 使用内存数据库
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-# 创建测试用的异步引擎
+# 创建测试用的异步引擎，所有会话共用同一个内存数据库连接，保证建表结果对所有会话可见
 test_engine = create_async_engine(
     TEST_DATABASE_URL,
-    pool_pre_ping=True,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
     echo=False,
 )
 
+
+# sqlite驱动默认延迟发出BEGIN，会导致保存点不在事务中；关闭驱动的事务管理，由SQLAlchemy显式开启事务
+@event.listens_for(test_engine.sync_engine, "connect")
+def _disable_driver_transaction(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+# 测试数据无需持久化，关闭日志同步并将临时数据放在内存中；StaticPool下只在建立唯一连接时执行一次
+@event.listens_for(test_engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in ("journal_mode=MEMORY", "synchronous=OFF", "temp_store=MEMORY"):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
 # 创建测试会话
 TestAsyncSessionLocal = sessionmaker(
     bind=test_engine,
@@ -31,6 +65,7 @@ TestAsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
+
 @pytest.fixture(scope="session")
 def event_loop():
     """创建一个会话范围的事件循环"""
@@ -38,7 +73,8 @@ def event_loop():
     yield loop
     loop.close()
 
-@pytest.fixture(scope="session")
+
+@pytest_asyncio.fixture(scope="session")
 async def setup_database():
     # 创建所有表
     async with test_engine.begin() as conn:
@@ -50,16 +86,39 @@ async def setup_database():
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
-@pytest.fixture
+
+@pytest_asyncio.fixture
 async def db_session(setup_database) -> AsyncGenerator[AsyncSession, None]:
-    async with TestAsyncSessionLocal() as session:
-        yield session
-        await session.rollback()
+    """
+    每个测试在一个外层事务中运行，结束时整体回滚
+
+    会话绑定到已开启事务的连接上，应用代码中的commit只提交保存点，不会提交外层事务，
+    测试之间的数据互不影响，也无需按测试重建表。
+    """
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        session = TestAsyncSessionLocal(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+@pytest.fixture(scope="session")
+def app_client() -> Generator[TestClient, None, None]:
+    """
+    创建整个测试会话共用的测试客户端，应用只启动和关闭一次
+    """
+    # 使用 with 语句确保执行应用的启动和关闭流程
+    with TestClient(app) as client:
+        yield client
+
 
 @pytest.fixture
-async def client(db_session) -> Generator[TestClient, None, None]:
+def client(app_client: TestClient, db_session) -> Generator[TestClient, None, None]:
     """
-    创建测试客户端
+    为每个测试应用数据库依赖覆盖，测试结束后移除
     """
     # 创建依赖覆盖
     async def override_get_db():
@@ -68,9 +127,16 @@ async def client(db_session) -> Generator[TestClient, None, None]:
     # 应用依赖覆盖
     app.dependency_overrides[get_db] = override_get_db
     
-    # 使用 with 语句确保关闭客户端连接
-    with TestClient(app) as client:
-        yield client
+    yield app_client
     
     # 清理
-    app.dependency_overrides = {}
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def async_client() -> AsyncGenerator[AsyncClient, None]:
+    """
+    创建整个测试会话共用的异步测试客户端，请求通过ASGI直接交给应用处理，不经过网络
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
@@ -14,12 +14,10 @@ from app.services.session_service import session_service
 @pytest.fixture
 def mock_session_service():
     """模拟会话服务"""
-    with patch.object(
-        session_service, 'create_session', return_value=AsyncMock(return_value='test-session-id')
-    ), patch.object(
+    with patch.multiple(
         session_service,
-        'get_session',
-        return_value=AsyncMock(
+        create_session=AsyncMock(return_value='test-session-id'),
+        get_session=AsyncMock(
             return_value={
                 'id': 'test-session-id',
                 'created_at': '2023-01-01T00:00:00',
@@ -28,9 +26,11 @@ def mock_session_service():
                 'state': {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None},
             }
         ),
-    ), patch.object(session_service, 'add_message', return_value=AsyncMock(return_value=True)), patch.object(
-        session_service, 'update_session', return_value=AsyncMock(return_value=True)
-    ), patch.object(session_service, 'delete_session', return_value=AsyncMock(return_value=True)):
+        add_message=AsyncMock(return_value=True),
+        add_messages_bulk=AsyncMock(return_value=True),
+        update_session=AsyncMock(return_value=True),
+        delete_session=AsyncMock(return_value=True),
+    ):
         yield
 
 
@@ -40,6 +40,7 @@ def mock_shipping_fee_agent():
     with patch.object(
         shipping_fee_agent,
         'process_message',
+        new_callable=AsyncMock,
         return_value={
             'reply': '这是助手的测试回复',
             'state': {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None},
@@ -76,29 +77,46 @@ def test_chat_with_shipping_fee_agent_existing_session(
     assert data['session_id'] == 'test-session-id'
 
 
+def test_batch_chat_with_shipping_fee_agent(client: TestClient, mock_session_service, mock_shipping_fee_agent):
+    """测试批量发送消息，响应按请求顺序返回"""
+    response = client.post(
+        '/nativeai/agents/batch',
+        json={
+            'requests': [
+                {'id': 'req-1', 'content': '我想了解运费险', 'session_id': 'test-session-id'},
+                {'id': 'req-2', 'content': '食品支持运费险吗'},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item['id'] for item in data['responses']] == ['req-1', 'req-2']
+    assert all(item['reply'] == '这是助手的测试回复' for item in data['responses'])
+
+
 def test_get_session_detail(client: TestClient, mock_session_service):
     """测试获取会话详情"""
     # 模拟session_service.get_session返回更丰富的数据
     with patch.object(
         session_service,
         'get_session',
-        return_value=AsyncMock(
-            return_value={
-                'id': 'test-session-id',
-                'created_at': '2023-01-01T00:00:00',
-                'updated_at': '2023-01-01T01:00:00',
-                'user_id': 'test-user',
-                'messages': [
-                    {'role': 'user', 'content': '你好', 'timestamp': '2023-01-01T00:30:00'},
-                    {
-                        'role': 'assistant',
-                        'content': '您好，有什么可以帮助您的吗？',
-                        'timestamp': '2023-01-01T00:30:05',
-                    },
-                ],
-                'state': {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None},
-            }
-        ),
+        new_callable=AsyncMock,
+        return_value={
+            'id': 'test-session-id',
+            'created_at': '2023-01-01T00:00:00',
+            'updated_at': '2023-01-01T01:00:00',
+            'user_id': 'test-user',
+            'messages': [
+                {'role': 'user', 'content': '你好', 'timestamp': '2023-01-01T00:30:00'},
+                {
+                    'role': 'assistant',
+                    'content': '您好，有什么可以帮助您的吗？',
+                    'timestamp': '2023-01-01T00:30:05',
+                },
+            ],
+            'state': {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None},
+        },
     ):
         response = client.get('/nativeai/agents/sessions/test-session-id')
 
@@ -114,3 +132,15 @@ def test_delete_session(client: TestClient, mock_session_service):
     """测试删除会话"""
     response = client.delete('/nativeai/agents/sessions/test-session-id')
     assert response.status_code == 204
+
+
+def test_list_sessions_without_user_id(client: TestClient):
+    """测试不提供user_id时列出全部会话"""
+    with patch.object(
+        session_service, 'list_user_sessions', new_callable=AsyncMock, return_value=([], 0)
+    ) as list_user_sessions:
+        response = client.get('/nativeai/agents/sessions', params={'limit': 5})
+
+    assert response.status_code == 200
+    assert response.json() == {'sessions': [], 'total': 0}
+    list_user_sessions.assert_awaited_once_with(None, limit=5, skip=0)
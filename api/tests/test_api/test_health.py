@@ -6,29 +6,34 @@ from httpx import AsyncClient
 
 from app.db.redis_client import redis_client
 
+
+@pytest.fixture
+def mock_redis_client():
+    """模拟Redis客户端的读写"""
+    with patch.object(redis_client, "set", new_callable=AsyncMock, return_value=True), \
+         patch.object(redis_client, "get", new_callable=AsyncMock, return_value="ok"):
+        yield
+
+
 # 同步测试
-def test_health_check(client: TestClient):
+def test_health_check(client: TestClient, mock_redis_client):
     """测试健康检查端点"""
-    with patch.object(redis_client, "set", return_value=AsyncMock(return_value=True)), \
-         patch.object(redis_client, "get", return_value=AsyncMock(return_value="ok")):
-        response = client.get("/api/health")
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "ok"
-        assert "version" in data
-        assert "timestamp" in data
-        assert data["redis_connected"] == True
+    response = client.get("/nativeai/health")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert "version" in data
+    assert "timestamp" in data
+    assert data["redis_connected"] is True
+
 
 # 异步测试
 @pytest.mark.asyncio
-async def test_health_check_async():
+async def test_health_check_async(async_client: AsyncClient, mock_redis_client):
     """异步测试健康检查端点"""
-    with patch.object(redis_client, "set", return_value=AsyncMock(return_value=True)), \
-         patch.object(redis_client, "get", return_value=AsyncMock(return_value="ok")):
-        async with AsyncClient(base_url="http://test") as ac:
-            response = await ac.get("/api/health")
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == "ok"
+    response = await async_client.get("/nativeai/health")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
@@ -0,0 +1,80 @@
+"""
+大模型问答API测试
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import llm as llm_endpoint
+from app.services.llm_service import LLMStreamError
+from app.services.session_service import session_service
+
+
+@pytest.fixture
+def mock_session_service():
+    """模拟会话服务"""
+    with patch.multiple(
+        session_service,
+        create_session=AsyncMock(return_value='test-session-id'),
+        add_message=AsyncMock(return_value=True),
+        add_messages_bulk=AsyncMock(return_value=True),
+    ):
+        yield
+
+
+def parse_events(body: str):
+    """将SSE响应体解析为(事件类型, 数据)列表"""
+    events = []
+    for block in body.strip().split('\n\n'):
+        event, data = 'message', None
+        for line in block.split('\n'):
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                data = orjson.loads(line[len('data: '):])
+        events.append((event, data))
+    return events
+
+
+def test_ask_llm_question_stream(client: TestClient, mock_session_service):
+    """测试流式问答逐段返回回答，结束后保存完整回答"""
+
+    async def fake_stream(*args, **kwargs):
+        yield '运费险'
+        yield '是一种保险'
+
+    with patch.object(llm_endpoint, 'get_llm_response_stream', fake_stream):
+        response = client.post('/nativeai/llm/question/stream', json={'question': '什么是运费险'})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = parse_events(response.text)
+    assert [data['delta'] for _, data in events[:-1]] == ['运费险', '是一种保险']
+    assert events[-1][1]['done'] is True
+    assert events[-1][1]['reply'] == '运费险是一种保险'
+    session_service.add_messages_bulk.assert_awaited_once()
+    assert session_service.add_messages_bulk.await_args.args[1][0]['content'] == '运费险是一种保险'
+
+
+def test_ask_llm_question_stream_upstream_error(client: TestClient, mock_session_service):
+    """测试上游出错时发送error事件，且不保存不完整的回答"""
+
+    async def failing_stream(*args, **kwargs):
+        yield '运费险'
+        raise LLMStreamError('抱歉，连接服务时出现问题，请稍后再试。')
+
+    with patch.object(llm_endpoint, 'get_llm_response_stream', failing_stream):
+        response = client.post('/nativeai/llm/question/stream', json={'question': '什么是运费险'})
+
+    assert response.status_code == 200
+    events = parse_events(response.text)
+    assert events[0] == ('message', {'delta': '运费险'})
+    assert events[-1] == (
+        'error',
+        {'error': '抱歉，连接服务时出现问题，请稍后再试。', 'session_id': 'test-session-id'},
+    )
+    session_service.add_message.assert_awaited_once()
+    session_service.add_messages_bulk.assert_not_awaited()
@@ -0,0 +1,3 @@
+"""
+数据访问层测试模块
+"""
@@ -0,0 +1,45 @@
+"""
+内存存储客户端测试
+"""
+
+import pytest
+import pytest_asyncio
+
+from app.db.redis_client import MemoryStorageClient
+
+
+@pytest_asyncio.fixture
+async def memory_storage():
+    """提供已初始化的内存存储客户端"""
+    client = MemoryStorageClient()
+    await client.initialize()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_expiry_heap_stays_bounded_by_live_keys(memory_storage: MemoryStorageClient):
+    """测试反复刷新同一批键的过期时间时，过期堆的大小与存活键数量成正比"""
+    for i in range(1000):
+        await memory_storage.set('token', str(i), expire=3600)
+        await memory_storage.expire('token', 3600)
+
+    assert len(memory_storage._storage) == 1
+    assert len(memory_storage._expiry_heap) <= 2 * len(memory_storage._storage) + 1
+    assert await memory_storage.get('token') == '999'
+
+
+@pytest.mark.asyncio
+async def test_container_writes_keep_expiry_heap_bounded(memory_storage: MemoryStorageClient):
+    """测试哈希、列表和有序集合写入后刷新过期时间，过期堆同样不随写入次数增长"""
+    for i in range(1000):
+        await memory_storage.hset('session:meta', {'updated_at': str(i)})
+        await memory_storage.rpush('session:messages', str(i))
+        await memory_storage.zadd('sessions:index', {'session': float(i)})
+        for key in ('session:meta', 'session:messages', 'sessions:index'):
+            await memory_storage.expire(key, 3600)
+
+    assert len(memory_storage._storage) == 3
+    assert len(memory_storage._expiry_heap) <= 2 * len(memory_storage._storage) + 1
+    assert await memory_storage.llen('session:messages') == 1000
+    assert (await memory_storage.hgetall('session:meta'))['updated_at'] == '999'
@@ -0,0 +1,3 @@
+"""
+服务层测试模块
+"""
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from app.db.redis_client import MemoryStorageClient, RedisClient
+from app.services import redis_service as redis_service_module
+from app.services import session_service as session_service_module
+from app.services.session_service import SessionService
+
+
+@pytest_asyncio.fixture(params=["memory", "redis"])
+async def storage(request):
+    """
+    提供存储客户端，分别覆盖内存存储(管道路径)和Redis(Lua脚本路径)
+
+    Redis使用fakeredis模拟，会话服务模块中的redis_client在测试期间被替换
+    """
+    if request.param == "memory":
+        client = MemoryStorageClient()
+        await client.initialize()
+    else:
+        client = RedisClient()
+        client._redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    with patch.object(session_service_module, "redis_client", client):
+        yield client
+
+    await client.close()
+
+
+@pytest.fixture
+def service(storage) -> SessionService:
+    """创建使用测试存储的会话服务"""
+    return SessionService()
+
+
+@pytest_asyncio.fixture
+async def cache_storage():
+    """为缓存服务提供内存存储，缓存服务模块中的redis_client在测试期间被替换"""
+    client = MemoryStorageClient()
+    await client.initialize()
+    with patch.object(redis_service_module, "redis_client", client):
+        yield client
+    await client.close()
@@ -0,0 +1,79 @@
+"""
+任务图构建器测试
+"""
+
+from typing import Annotated, Any, Dict, List, TypedDict
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.graph.message import add_messages
+
+from app.services.agents.graph_builder import build_graph
+from app.services.redis_service import cache_service
+
+
+class ToolState(TypedDict):
+    """测试用的图状态"""
+
+    tool: str
+    tool_args: Dict[str, Any]
+    messages: Annotated[List, add_messages]
+
+
+def build_tool_graph(calls: List[Dict[str, Any]], tool_cache_ttl: int):
+    """构建一个先调用lookup工具、拿到工具结果后结束的图，calls记录工具的实际调用参数"""
+
+    def lookup(tool_input: Dict[str, Any]) -> str:
+        calls.append(tool_input)
+        return f"结果:{tool_input['good_id']}"
+
+    async def main_node(state: ToolState) -> Dict[str, Any]:
+        if state['messages'][-1].type == 'ai':
+            return {'tool': '', 'tool_args': {}}
+        return {'tool': 'lookup', 'tool_args': {'good_id': state['messages'][-1].content}}
+
+    return build_graph(
+        main_node, ToolState, tools=[lookup], tool_cache=cache_service, tool_cache_ttl=tool_cache_ttl
+    )
+
+
+async def run(graph, good_id: str) -> str:
+    """以商品ID作为用户消息运行图，返回工具结果"""
+    result = await graph.ainvoke({'tool': '', 'tool_args': {}, 'messages': [HumanMessage(content=good_id)]})
+    return result['messages'][-1].content
+
+
+@pytest.mark.asyncio
+async def test_tool_cache_hit_skips_tool_call(cache_storage):
+    """测试相同工具和参数的调用命中缓存，不再执行工具；不同参数各自执行"""
+    calls = []
+    graph = build_tool_graph(calls, tool_cache_ttl=60)
+
+    assert await run(graph, '123') == '结果:123'
+    assert await run(graph, '123') == '结果:123'
+    assert calls == [{'good_id': '123'}]
+
+    assert await run(graph, '456') == '结果:456'
+    assert calls == [{'good_id': '123'}, {'good_id': '456'}]
+
+
+@pytest.mark.asyncio
+async def test_tool_cache_disabled_when_ttl_is_zero(cache_storage):
+    """测试缓存有效期为0时每次都执行工具，也不写入缓存"""
+    calls = []
+    graph = build_tool_graph(calls, tool_cache_ttl=0)
+
+    await run(graph, '123')
+    await run(graph, '123')
+    assert len(calls) == 2
+    assert not cache_storage._storage
+
+
+def test_cache_keys_differ_across_inputs():
+    """测试缓存键由命名空间和参数决定，参数字典的键顺序不影响结果"""
+    key = cache_service.make_key('tool', 'lookup', {'good_id': '123', 'good_name': '食品'})
+
+    assert key == cache_service.make_key('tool', 'lookup', {'good_name': '食品', 'good_id': '123'})
+    assert key != cache_service.make_key('tool', 'lookup', {'good_id': '456', 'good_name': '食品'})
+    assert key != cache_service.make_key('tool', 'query', {'good_id': '123', 'good_name': '食品'})
+    assert key != cache_service.make_key('response', 'lookup', {'good_id': '123', 'good_name': '食品'})
@@ -0,0 +1,58 @@
+"""
+LLM服务测试
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_service
+
+
+@pytest.fixture
+def configured_llm():
+    """配置API密钥，使请求构造能够通过"""
+    with patch.object(settings, 'LLM_API_KEY', 'test-key'), \
+            patch.object(settings, 'LLM_API_BASE', 'http://llm.test/v1'):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_upstream_call(configured_llm):
+    """测试并发的相同请求只向上游发送一次，所有调用方得到同一回答"""
+    release = asyncio.Event()
+
+    async def slow_completion(url, headers, payload):
+        await release.wait()
+        return '运费险是一种保险'
+
+    with patch.object(
+        llm_service, '_request_completion', new_callable=AsyncMock, side_effect=slow_completion
+    ) as upstream:
+        callers = [asyncio.ensure_future(llm_service.get_llm_response('什么是运费险')) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert len(llm_service._inflight_requests) == 1
+
+        release.set()
+        assert await asyncio.gather(*callers) == ['运费险是一种保险'] * 2
+
+    assert upstream.await_count == 1
+    assert not llm_service._inflight_requests
+
+
+@pytest.mark.asyncio
+async def test_failed_request_is_not_left_in_flight(configured_llm):
+    """测试请求失败后从进行中的请求表中移除，后续相同请求重新发送"""
+    with patch.object(
+        llm_service, '_request_completion', new_callable=AsyncMock, side_effect=[RuntimeError('连接中断'), '回答']
+    ) as upstream:
+        with pytest.raises(RuntimeError):
+            await llm_service.get_llm_response('什么是运费险')
+        assert not llm_service._inflight_requests
+
+        assert await llm_service.get_llm_response('什么是运费险') == '回答'
+
+    assert upstream.await_count == 2
+    assert not llm_service._inflight_requests
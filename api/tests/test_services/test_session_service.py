@@ -0,0 +1,270 @@
+"""
+会话服务测试
+"""
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.config import Settings, settings
+from app.db.redis_client import MemoryStorageClient
+from app.services.agents.shipping_fee_agent import shipping_fee_agent
+from app.db import redis_client as redis_client_module
+from app.services.session_service import APPEND_MESSAGES_SCRIPT, SessionService
+
+
+async def remaining_ttl(storage, key: str) -> float:
+    """读取键的剩余有效期(秒)，兼容内存存储和Redis"""
+    if isinstance(storage, MemoryStorageClient):
+        return storage._storage[key][1] - time.monotonic()
+    return await storage._redis.ttl(key)
+
+
+@pytest.mark.asyncio
+async def test_get_session_returns_independent_copies(service: SessionService):
+    """测试每次读取返回独立的会话数据，修改不影响缓存"""
+    service.cache_ttl = 5
+    session_id = await service.create_session('test-user')
+
+    first = await service.get_session(session_id)
+    first['state']['messages'].append({'content': '未保存的消息'})
+    first['state']['human_turns'] = 5
+
+    second = await service.get_session(session_id)
+    assert second['state']['messages'] == []
+    assert second['state']['human_turns'] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_does_not_touch_cached_state(service: SessionService):
+    """测试对话处理失败时，缓存中的会话状态保持不变"""
+    service.cache_ttl = 5
+    session_id = await service.create_session('test-user')
+    session_data = await service.get_session(session_id)
+
+    with patch.object(shipping_fee_agent.graph, 'ainvoke', new_callable=AsyncMock, side_effect=RuntimeError('模型调用失败')):
+        with pytest.raises(RuntimeError):
+            await shipping_fee_agent.process_message('第一条消息', session_id, session_data['state'])
+
+    state = (await service.get_session(session_id))['state']
+    assert state['messages'] == []
+    assert state['human_turns'] == 0
+
+
+@pytest.mark.asyncio
+async def test_multiple_workers_do_not_overwrite_each_others_state(storage):
+    """测试多个工作进程共用存储时，一个进程不会用过期的缓存状态覆盖另一个进程保存的状态"""
+    with patch.object(Settings, 'EFFECTIVE_WORKERS', 2), patch.object(settings, 'SESSION_CACHE_TTL_SECONDS', 5):
+        worker_a, worker_b = SessionService(), SessionService()
+    session_id = await worker_a.create_session('test-user')
+    await worker_a.get_session(session_id)
+
+    # 工作进程B处理第一轮对话
+    state = (await worker_b.get_session(session_id))['state']
+    state['human_turns'] += 1
+    await worker_b.add_messages_bulk(session_id, [{'role': 'user', 'content': 'turn1'}], state)
+
+    # 工作进程A处理第二轮对话，读到的应是B保存后的状态
+    state = (await worker_a.get_session(session_id))['state']
+    state['human_turns'] += 1
+    await worker_a.add_messages_bulk(session_id, [{'role': 'user', 'content': 'turn2'}], state)
+
+    session_data = await worker_b.get_session(session_id)
+    assert session_data['state']['human_turns'] == 2
+    assert [m['content'] for m in session_data['messages']] == ['turn1', 'turn2']
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_orders_by_last_activity(service: SessionService):
+    """测试用户会话列表按最后活跃时间倒序，追加消息后会话排到最前"""
+    first = await service.create_session('test-user')
+    second = await service.create_session('test-user')
+    await service.create_session('other-user')
+
+    assert await service.add_message(first, {'role': 'user', 'content': '你好'}, user_id='test-user')
+
+    sessions, total = await service.list_user_sessions('test-user')
+    assert total == 2
+    assert [session['id'] for session in sessions] == [first, second]
+    assert sessions[0]['message_count'] == 1
+
+
+@pytest.mark.asyncio
+async def test_list_all_sessions_without_user(service: SessionService, storage):
+    """测试不指定用户时从全部会话索引列出所有用户和匿名会话，过期成员同样在计数前清理"""
+    anonymous = await service.create_session()
+    owned = await service.create_session('test-user')
+    expired = await service.create_session('other-user')
+    await storage.zadd(service._index_key(), {expired: time.time() - service.session_ttl - 1})
+
+    assert await service.add_message(anonymous, {'role': 'user', 'content': '你好'})
+
+    sessions, total = await service.list_user_sessions(limit=10)
+    assert total == 2
+    assert [session['id'] for session in sessions] == [anonymous, owned]
+    assert 0 < await remaining_ttl(storage, service._index_key()) <= service.session_ttl
+
+    assert await service.delete_session(owned)
+    assert await storage.zcard(service._index_key()) == 1
+    assert await storage.zcard(service._index_key('test-user')) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_prunes_expired_entries_before_counting(service: SessionService, storage):
+    """测试超过有效期的索引成员在计数前被清理，不在当前页的过期会话同样不计入总数"""
+    active = await service.create_session('test-user')
+    expired = await service.create_session('test-user')
+    index_key = service._index_key('test-user')
+    await storage.zadd(index_key, {expired: time.time() - service.session_ttl - 1})
+
+    sessions, total = await service.list_user_sessions('test-user', limit=1)
+    assert total == 1
+    assert [session['id'] for session in sessions] == [active]
+    assert await storage.zcard(index_key) == 1
+
+
+@pytest.mark.asyncio
+async def test_user_index_expires_with_sessions(service: SessionService, storage):
+    """测试用户会话索引设置了有效期，删除会话时同步移除索引成员"""
+    session_id = await service.create_session('test-user')
+    index_key = service._index_key('test-user')
+
+    assert 0 < await remaining_ttl(storage, index_key) <= service.session_ttl
+
+    assert await service.delete_session(session_id)
+    assert await storage.zcard(index_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_add_messages_bulk_uses_caller_timestamp(service: SessionService):
+    """测试传入的写入时间同时用于消息时间戳和会话更新时间"""
+    session_id = await service.create_session('test-user')
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    assert await service.add_messages_bulk(
+        session_id, [{'role': 'assistant', 'content': '回复'}], data={'last_activity': now.isoformat()}, now=now
+    )
+
+    session_data = await service.get_session(session_id)
+    assert session_data['messages'][0]['timestamp'] == now.isoformat()
+    assert session_data['updated_at'] == session_data['last_activity'] == now.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_add_messages_appends_in_order_and_updates_fields(service: SessionService, storage):
+    """测试追加消息只写入新消息和变更字段，Redis存储通过Lua脚本完成"""
+    session_id = await service.create_session('test-user')
+
+    assert await service.add_messages_bulk(
+        session_id,
+        [{'role': 'user', 'content': '问题'}, {'role': 'assistant', 'content': '回答'}],
+        state={'messages': [], 'tool': 'calc', 'tool_args': {}, 'last_tool': None, 'human_turns': 1},
+    )
+    assert await service.update_session(session_id, {'title': '运费险咨询'})
+
+    service._cache.clear()
+    session_data = await service.get_session(session_id)
+    assert [message['content'] for message in session_data['messages']] == ['问题', '回答']
+    assert session_data['state']['tool'] == 'calc'
+    assert session_data['title'] == '运费险咨询'
+    assert session_data['updated_at'] is not None
+    if isinstance(storage, MemoryStorageClient):
+        assert not hasattr(storage, 'eval_script')
+    else:
+        assert APPEND_MESSAGES_SCRIPT in storage._scripts
+
+
+@pytest.mark.asyncio
+async def test_add_messages_to_missing_session_returns_false(service: SessionService, storage):
+    """测试会话不存在时追加失败，且不会创建消息列表"""
+    assert not await service.add_message('missing-session', {'role': 'user', 'content': '你好'})
+    assert not await service.update_session('missing-session', {'title': '标题'})
+    assert await storage.llen(service._msgs_key('missing-session')) == 0
+    assert not await storage.hgetall(service._meta_key('missing-session'))
+
+
+@pytest.mark.asyncio
+async def test_get_session_refreshes_ttl(service: SessionService, storage):
+    """测试读取会话时刷新元数据和消息列表的有效期"""
+    session_id = await service.create_session('test-user')
+    await service.add_message(session_id, {'role': 'user', 'content': '你好'})
+    for key in (service._meta_key(session_id), service._msgs_key(session_id)):
+        await storage.expire(key, 10)
+
+    # 跳过刷新间隔，使下一次读取发送EXPIRE
+    service._ttl_refreshed_at.clear()
+    assert await service.get_session(session_id)
+
+    for key in (service._meta_key(session_id), service._msgs_key(session_id)):
+        assert await remaining_ttl(storage, key) > 10
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_prunes_missing_sessions_on_page(service: SessionService, storage):
+    """测试当前页中已不存在的会话从索引移除，并从总数中扣除"""
+    session_ids = [await service.create_session('test-user') for _ in range(3)]
+    await storage.delete(service._meta_key(session_ids[1]))
+
+    sessions, total = await service.list_user_sessions('test-user')
+    assert total == 2
+    assert {session['id'] for session in sessions} == {session_ids[0], session_ids[2]}
+    assert all(session['message_count'] == 0 for session in sessions)
+    assert await storage.zcard(service._index_key('test-user')) == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_storage_session_expires():
+    """测试内存存储中的会话在有效期后过期，过期后无法追加消息"""
+    clock = SimpleNamespace(now=1000.0)
+    storage = MemoryStorageClient()
+    await storage.initialize()
+
+    with patch.object(redis_client_module, 'time', SimpleNamespace(monotonic=lambda: clock.now)), \
+            patch('app.services.session_service.redis_client', storage):
+        service = SessionService()
+        service.cache_ttl = 0
+        session_id = await service.create_session('test-user')
+        assert await service.add_message(session_id, {'role': 'user', 'content': '你好'})
+
+        clock.now += service.session_ttl - 1
+        assert await service.get_session(session_id)
+
+        clock.now += service.session_ttl + 1
+        assert await service.get_session(session_id) is None
+        assert not await service.add_message(session_id, {'role': 'user', 'content': '还在吗'})
+        assert await storage.zcard(service._index_key('test-user')) == 0
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_stored_state_size_stays_flat_across_turns(service: SessionService, storage):
+    """测试state不再携带对话历史，每轮写入的state大小不随轮数增长，读取时由消息列表重建历史"""
+    session_id = await service.create_session('test-user')
+    state = {'messages': [], 'tool': '', 'tool_args': {}, 'last_tool': None, 'human_turns': 0}
+
+    sizes = []
+    for turn in range(1, 9):
+        state['messages'].extend([HumanMessage(content=f'question {turn}'), AIMessage(content=f'answer {turn}')])
+        state['human_turns'] = turn
+        assert await service.add_messages_bulk(
+            session_id,
+            [{'role': 'user', 'content': f'question {turn}'}, {'role': 'assistant', 'content': f'answer {turn}'}],
+            state,
+        )
+        meta = await storage.hgetall(service._meta_key(session_id))
+        sizes.append(len(meta['state']))
+
+    assert len(set(sizes)) == 1
+
+    service._cache.clear()
+    session_data = await service.get_session(session_id)
+    assert session_data['state']['human_turns'] == 8
+    assert session_data['state']['messages'][-2:] == [
+        {'role': 'user', 'content': 'question 8'},
+        {'role': 'assistant', 'content': 'answer 8'},
+    ]
@@ -0,0 +1,105 @@
+"""
+运费险智能体测试
+"""
+
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.services.agents import shipping_fee_agent as agent_module
+from app.services.agents.shipping_fee_agent import _count_tokens, shipping_fee_agent, trim_messages_by_tokens
+
+
+class FakeEncoding:
+    """每两个字符计为一个token的编码器"""
+
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + 2] for i in range(0, len(text), 2)]
+
+
+def test_trim_messages_by_tokens_boundary():
+    """测试累计token数恰好等于预算时保留，超出预算时截断，且至少保留最后一条消息"""
+    # 编码器未加载，按字符数计算token
+    messages = [HumanMessage(content='aaaa'), AIMessage(content='bb'), HumanMessage(content='ccc')]
+
+    assert trim_messages_by_tokens(messages, 5, 'unloaded-model') == messages[1:]
+    assert trim_messages_by_tokens(messages, 4, 'unloaded-model') == messages[2:]
+    assert trim_messages_by_tokens(messages, 9, 'unloaded-model') == messages
+    assert trim_messages_by_tokens(messages, 1, 'unloaded-model') == messages[2:]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_encoding_off_event_loop():
+    """测试编码器在工作线程中加载，加载前按字符数估算的结果被丢弃"""
+    loaded_in = []
+
+    def encoding_for_model(model_name):
+        loaded_in.append(threading.current_thread())
+        return FakeEncoding()
+
+    with patch.dict(agent_module._encodings, clear=True), \
+            patch.object(shipping_fee_agent, '_model_name', 'fake-model'), \
+            patch('tiktoken.encoding_for_model', side_effect=encoding_for_model):
+        assert _count_tokens('abcd', 'fake-model') == 4
+
+        await shipping_fee_agent.warm_up()
+
+        assert loaded_in and loaded_in[0] is not threading.main_thread()
+        assert _count_tokens('abcd', 'fake-model') == 2
+    _count_tokens.cache_clear()
+
+
+def fake_llm() -> AsyncMock:
+    """返回带工具调用的模型回复的模拟模型"""
+    llm = AsyncMock()
+    llm.ainvoke.return_value = AIMessage(
+        content='', tool_calls=[{'name': 'query_good_support', 'args': {'good_id': '123'}, 'id': 'call-1'}]
+    )
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_response_cache_hit_skips_llm_call(cache_storage):
+    """测试相同命名空间和消息的调用命中缓存，不再调用模型，缓存的回复保留工具调用"""
+    llm = fake_llm()
+    messages = [SystemMessage(content='系统提示'), HumanMessage(content='食品支持运费险吗')]
+
+    with patch.object(settings, 'AGENT_RESPONSE_CACHE_TTL_SECONDS', 60):
+        first = await shipping_fee_agent._ainvoke_cached(llm, 'agent', messages)
+        second = await shipping_fee_agent._ainvoke_cached(llm, 'agent', messages)
+
+    assert llm.ainvoke.await_count == 1
+    assert second.tool_calls[0]['name'] == first.tool_calls[0]['name'] == 'query_good_support'
+    assert second.tool_calls[0]['args'] == {'good_id': '123'}
+
+
+@pytest.mark.asyncio
+async def test_response_cache_disabled_when_ttl_is_zero(cache_storage):
+    """测试缓存有效期为0时每次都调用模型，也不写入缓存"""
+    llm = fake_llm()
+    messages = [HumanMessage(content='食品支持运费险吗')]
+
+    with patch.object(settings, 'AGENT_RESPONSE_CACHE_TTL_SECONDS', 0):
+        await shipping_fee_agent._ainvoke_cached(llm, 'agent', messages)
+        await shipping_fee_agent._ainvoke_cached(llm, 'agent', messages)
+
+    assert llm.ainvoke.await_count == 2
+    assert not cache_storage._storage
+
+
+@pytest.mark.asyncio
+async def test_response_cache_keys_differ_across_inputs(cache_storage):
+    """测试不同的消息内容、消息类型或命名空间分别缓存，不会互相命中"""
+    llm = fake_llm()
+
+    with patch.object(settings, 'AGENT_RESPONSE_CACHE_TTL_SECONDS', 60):
+        await shipping_fee_agent._ainvoke_cached(llm, 'agent', [HumanMessage(content='食品')])
+        await shipping_fee_agent._ainvoke_cached(llm, 'agent', [HumanMessage(content='家电')])
+        await shipping_fee_agent._ainvoke_cached(llm, 'agent', [AIMessage(content='食品')])
+        await shipping_fee_agent._ainvoke_cached(llm, 'response', [HumanMessage(content='食品')])
+
+    assert llm.ainvoke.await_count == 4
+    assert len(cache_storage._storage) == 4
@@ -0,0 +1,193 @@
+"""
+通用工具函数测试
+
+改写后的工具函数与基线实现逐项对照，保证行为不变。
+"""
+
+import hashlib
+import json
+import re
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils.common import (
+    generate_uuid,
+    get_formatted_datetime,
+    get_timestamp,
+    is_valid_email,
+    md5,
+    md5_bytes,
+    safe_json_dumps,
+    safe_json_loads,
+    truncate_string,
+)
+
+# 基准测试的重复次数，足以拉开差距，又不会明显拖慢测试
+BENCHMARK_ROUNDS = 2000
+
+
+def baseline_is_valid_email(email: str) -> bool:
+    """基线实现：每次调用时按模式字符串匹配"""
+    return bool(re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email))
+
+
+def baseline_safe_json_dumps(obj):
+    """基线实现：标准库json序列化，日期时间转为ISO格式"""
+
+    def json_serial(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Type {type(value)} not serializable")
+
+    try:
+        return json.dumps(obj, default=json_serial, ensure_ascii=False)
+    except Exception:
+        return "{}"
+
+
+def test_generate_uuid_keeps_dashed_format():
+    """测试generate_uuid仍返回带连字符的UUID字符串，与已存储的会话ID格式一致"""
+    value = generate_uuid()
+
+    assert str(uuid.UUID(value)) == value
+    assert uuid.UUID(value).version == 4
+    assert generate_uuid() != value
+
+
+def test_get_timestamp_matches_baseline():
+    """测试时间戳与基线实现一样为整数秒"""
+    before = int(datetime.now().timestamp())
+    value = get_timestamp()
+    after = int(datetime.now().timestamp())
+
+    assert isinstance(value, int)
+    assert before <= value <= after
+
+
+@pytest.mark.parametrize('dt', [
+    datetime(2024, 1, 2, 3, 4, 5),
+    datetime(2024, 1, 2, 3, 4, 5, 999999),
+    datetime(999, 12, 31, 23, 59, 59),
+    datetime(1, 1, 1),
+    datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=8))),
+])
+@pytest.mark.parametrize('fmt', ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d'])
+def test_get_formatted_datetime_matches_strftime(dt, fmt):
+    """测试默认格式的快速路径与strftime结果一致，包括带微秒、年份不足四位和带时区的情况"""
+    assert get_formatted_datetime(dt, fmt) == dt.strftime(fmt)
+    if fmt == '%Y-%m-%d %H:%M:%S':
+        assert get_formatted_datetime(dt) == dt.strftime(fmt)
+
+
+def test_get_formatted_datetime_defaults_to_now():
+    """测试不传入时间时格式化当前时间"""
+    value = get_formatted_datetime()
+
+    assert abs(datetime.strptime(value, '%Y-%m-%d %H:%M:%S') - datetime.now()) < timedelta(seconds=2)
+
+
+def test_md5_matches_hashlib():
+    """测试MD5辅助函数的结果与hashlib直接计算的结果一致"""
+    for text in ['', 'abc', '运费险', 'x' * 1000]:
+        expected = hashlib.md5(text.encode('utf-8')).hexdigest()
+
+        assert md5(text) == expected
+        assert md5_bytes(text.encode('utf-8')) == expected
+
+
+def test_md5_cache_is_faster_for_repeated_input():
+    """基准测试：重复计算同一长字符串时命中缓存，比每次重新计算摘要更快"""
+    text = '运费险' * 5000
+    md5.cache_clear()
+    md5(text)
+
+    cached_time = timeit.timeit(lambda: md5(text), number=BENCHMARK_ROUNDS)
+    uncached_time = timeit.timeit(lambda: hashlib.md5(text.encode('utf-8')).hexdigest(), number=BENCHMARK_ROUNDS)
+
+    assert md5.cache_info().hits >= BENCHMARK_ROUNDS
+    assert cached_time < uncached_time
+    md5.cache_clear()
+
+
+@pytest.mark.parametrize('email', [
+    'user@example.com',
+    'first.last+tag@mail.example.co',
+    'user@example.com\n',
+    '\nuser@example.com',
+    'user@example.com ',
+    'user@example.c',
+    'user@example',
+    '@example.com',
+    'user@@example.com',
+    '用户@example.com',
+    '',
+])
+def test_is_valid_email_matches_baseline(email):
+    """测试邮箱校验与基线实现一致，包括末尾换行符等边界情况"""
+    assert is_valid_email(email) is baseline_is_valid_email(email)
+
+
+@pytest.mark.parametrize('text, max_length, suffix', [
+    ('abc', 5, '...'),
+    ('abcde', 5, '...'),
+    ('abcdef', 5, '...'),
+    ('运费险是一种保险', 6, '...'),
+    ('abcdef', 4, '…'),
+    ('abcdef', 2, '...'),
+    # 内容与默认后缀相同但不是同一对象，走按长度计算的分支
+    ('a' * 200, 100, ''.join(['.', '.', '.'])),
+])
+def test_truncate_string_matches_baseline(text, max_length, suffix):
+    """测试截断结果与基线实现一致，包括自定义后缀和后缀长于最大长度的情况"""
+    expected = text if len(text) <= max_length else text[:max_length - len(suffix)] + suffix
+
+    assert truncate_string(text, max_length, suffix) == expected
+
+
+def test_truncate_string_default_arguments():
+    """测试默认参数下超过100个字符时截断并添加省略号"""
+    assert truncate_string('a' * 101) == 'a' * 97 + '...'
+    assert truncate_string('a' * 100) == 'a' * 100
+
+
+@pytest.mark.parametrize('obj', [
+    {'question': '什么是运费险', 'count': 3, 'ratio': 0.5, 'ok': True, 'none': None},
+    [1, 'a', {'nested': ['运费险']}],
+    {'created_at': datetime(2024, 1, 2, 3, 4, 5, 6)},
+    {'created_at': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)},
+    {1: 'int key'},
+    'plain string',
+])
+def test_safe_json_dumps_matches_baseline(obj):
+    """测试序列化结果与基线实现解析后相同，非ASCII字符不转义；orjson输出不带分隔空格"""
+    value = safe_json_dumps(obj)
+
+    assert json.loads(value) == json.loads(baseline_safe_json_dumps(obj))
+    assert '\\u' not in value
+
+
+def test_safe_json_dumps_returns_empty_object_on_error():
+    """测试无法序列化的对象与基线实现一样返回空对象"""
+    assert safe_json_dumps({'value': object()}) == baseline_safe_json_dumps({'value': object()}) == '{}'
+    assert safe_json_dumps({1, 2}) == '{}'
+
+
+@pytest.mark.parametrize('text', [
+    '{"question": "什么是运费险", "count": 3}',
+    '[1, 2.5, null, true]',
+    '"plain"',
+    b'{"a": 1}',
+])
+def test_safe_json_loads_matches_baseline(text):
+    """测试反序列化结果与基线实现一致，也接受字节串"""
+    assert safe_json_loads(text) == json.loads(text)
+
+
+@pytest.mark.parametrize('text', ['', '{', '[1,]', 'undefined', None, 123])
+def test_safe_json_loads_returns_none_on_error(text):
+    """测试无效输入与基线实现一样返回None"""
+    assert safe_json_loads(text) is None